@@ -5,7 +5,6 @@
 import color
 import exceptions
 from part_types import PartType
-import copy
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -45,22 +44,21 @@ def perform(self) -> None:
         actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if item.stack:
-                    for inv_item in inventory.items:
-                        if inv_item.stack and inv_item.name == item.name:
-                            inv_item.stack.stack += item.stack.stack
-                            return
-                if len(inventory.items) >= inventory.capacity:
-                    raise exceptions.Impossible("Your inventory is full.")
+        for item in self.engine.game_map.get_items_at_location(actor_location_x, actor_location_y):
+            if item.stack:
+                for inv_item in inventory.items:
+                    if inv_item.stack and inv_item.name == item.name:
+                        inv_item.stack.stack += item.stack.stack
+                        return
+            if len(inventory.items) >= inventory.capacity:
+                raise exceptions.Impossible("Your inventory is full.")
 
-                self.engine.game_map.entities.remove(item)
-                item.parent = self.entity.inventory
-                inventory.items.append(item)
+            self.engine.game_map.remove_entity(item)
+            item.parent = self.entity.inventory
+            inventory.items.append(item)
 
-                self.engine.message_log.add_message(f"You picked up the {item.name}!")
-                return
+            self.engine.message_log.add_message(f"You picked up the {item.name}!")
+            return
 
         raise exceptions.Impossible("There is nothing here to pick up.")
 
@@ -122,12 +120,24 @@ def perform(self) -> None:
         Take the stairs, if any exist at the entity's location.
         """
         if (self.entity.x, self.entity.y) == self.engine.game_map.downstairs_location:
-            self.engine.game_world.generate_floor()
+            self.engine.game_world.descend()
             self.engine.message_log.add_message("You descend the staircase.", color.descend)
         else:
             raise exceptions.Impossible("There are no stairs here.")
 
 
+class TakeUpStairsAction(Action):
+    def perform(self) -> None:
+        """
+        Climb back up the stairs, if the entity is standing on them.
+        """
+        if (self.entity.x, self.entity.y) == self.engine.game_map.upstairs_location:
+            self.engine.game_world.ascend()
+            self.engine.message_log.add_message("You climb the staircase.", color.descend)
+        else:
+            raise exceptions.Impossible("There are no stairs up here.")
+
+
 class ActionWithDirection(Action):
     def __init__(self, entity: Actor, dx: int, dy: int):
         super().__init__(entity)
@@ -224,30 +234,29 @@ def perform(self) -> None:
                 if offering.stack.stack == 0:
                     self.entity.inventory.items.remove(offering)
         import entity_factories
-        if self.part.part_type == PartType.ARM:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_arm).part)
-        elif self.part.part_type == PartType.BRAIN:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_brain).part)
-        elif self.part.part_type == PartType.EAR:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_ear).part)
-        elif self.part.part_type == PartType.EYE:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_eye).part)
-        elif self.part.part_type == PartType.HEART:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_heart).part)
-        elif self.part.part_type == PartType.LEG:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_leg).part)
-        elif self.part.part_type == PartType.TONGUE:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_tongue).part)
-        elif self.part.part_type == PartType.TORSO:
-            self.entity.body.parts.append(copy.deepcopy(entity_factories.phantom_torso).part)
-        self.entity.body.parts.remove(self.part)
+        phantoms = {
+            PartType.ARM: entity_factories.phantom_arm,
+            PartType.BRAIN: entity_factories.phantom_brain,
+            PartType.EAR: entity_factories.phantom_ear,
+            PartType.EYE: entity_factories.phantom_eye,
+            PartType.HEART: entity_factories.phantom_heart,
+            PartType.LEG: entity_factories.phantom_leg,
+            PartType.TONGUE: entity_factories.phantom_tongue,
+            PartType.TORSO: entity_factories.phantom_torso,
+        }
+        if self.part.part_type in phantoms:
+            part = phantoms[self.part.part_type].clone().part
+            assert part
+            self.entity.body.add_part(part)
+        self.entity.body.remove_part(self.part)
 
         damage = 10 + sum_quality
         self.engine.message_log.add_message(f"The flesh explodes in a burst of energy", color.spiritual)
-        damaged_actors: List[Actor] = []
-        for actor in self.engine.game_map.actors:
-            if actor.distance(self.entity.x, self.entity.y) <= radius and not actor == self.entity:
-                damaged_actors.append(actor)
+        damaged_actors = [
+            actor
+            for actor in self.engine.game_map.actors_in_radius(self.entity.x, self.entity.y, radius)
+            if actor is not self.entity
+        ]
         for actor in damaged_actors:
             self.engine.message_log.add_message(
                 f"The {actor.name} is engulfed the explosion, taking {damage} damage!"
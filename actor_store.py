@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from entity import Actor, Entity
+
+
+class ActorStore:
+    """Parallel arrays of the position, liveness, blocking and render order of the actors on one map.
+
+    Row `i` of every array describes `handles[i]`, rows of removed actors are reused.  The Actor objects stay
+    authoritative, GameMap keeps this store in sync with them so that spatial queries over many actors can be
+    answered with array operations instead of a loop over every entity.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)  # False for unused rows too.
+        self.blocks = np.zeros(capacity, dtype=bool)
+        self.render_order = np.zeros(capacity, dtype=np.int8)
+        self.handles = np.full(capacity, None, dtype=object)
+        self.rows: Dict[Entity, int] = {}
+        self.free_rows: List[int] = list(reversed(range(capacity)))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, actor: Actor) -> bool:
+        return actor in self.rows
+
+    def add(self, actor: Actor) -> None:
+        if not self.free_rows:
+            self.grow()
+        row = self.rows[actor] = self.free_rows.pop()
+        self.handles[row] = actor
+        self.move(actor)
+        self.update(actor)
+
+    def remove(self, actor: Actor) -> None:
+        row = self.rows.pop(actor)
+        self.handles[row] = None
+        self.alive[row] = self.blocks[row] = False
+        self.free_rows.append(row)
+
+    def move(self, actor: Actor) -> None:
+        """Copy the position of an actor into the store."""
+        row = self.rows[actor]
+        self.x[row] = actor.x
+        self.y[row] = actor.y
+
+    def update(self, entity: Entity) -> None:
+        """Copy the liveness, blocking and render order of an entity into the store, if it is a stored actor."""
+        row = self.rows.get(entity)
+        if row is None:
+            return
+        actor: Actor = self.handles[row]
+        self.alive[row] = actor.is_alive
+        self.blocks[row] = actor.blocks_movement
+        self.render_order[row] = actor.render_order.value
+
+    def grow(self) -> None:
+        """Double the number of rows."""
+        capacity = len(self.handles)
+        for name in ("x", "y", "alive", "blocks", "render_order", "handles"):
+            array = getattr(self, name)
+            grown = np.zeros_like(array, shape=capacity * 2)
+            grown[:capacity] = array
+            setattr(self, name, grown)
+        self.handles[capacity:] = None
+        self.free_rows.extend(reversed(range(capacity, capacity * 2)))
+
+    def distances_squared(self, x: int, y: int) -> np.ndarray:
+        """Return the squared distance from a position to every row."""
+        return (self.x - x) ** 2 + (self.y - y) ** 2
+
+    def living_in_area(self, area: Tuple[slice, slice]) -> List[Actor]:
+        """Return the living actors inside of a map area, in no particular order."""
+        x_slice, y_slice = area
+        mask = (
+            self.alive
+            & (x_slice.start <= self.x)
+            & (self.x < x_slice.stop)
+            & (y_slice.start <= self.y)
+            & (self.y < y_slice.stop)
+        )
+        return self.handles[mask].tolist()
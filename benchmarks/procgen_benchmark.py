@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Measure the cost of each dungeon generator across map sizes and floor numbers.
+
+Floor numbers matter because `max_monsters_by_floor` and `max_items_by_floor` change how much is spawned.
+Results are written as JSON so that runs from two commits can be diffed.
+
+Run from the project root:  python benchmarks/procgen_benchmark.py --output procgen.json
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from engine import Engine  # noqa: E402
+from entity import Actor, Item  # noqa: E402
+from game_map import GameMap, GameWorld  # noqa: E402
+import entity_factories  # noqa: E402
+import procgen  # noqa: E402
+
+# Same room settings as setup_game.new_game.
+ROOM_MIN_SIZE = 6
+ROOM_MAX_SIZE = 10
+MAX_ROOMS = 30
+
+GENERATORS: Dict[str, Callable[[Engine, int, int], GameMap]] = {
+    "box": lambda engine, width, height: procgen.generate_box_dungeon(
+        max_rooms=MAX_ROOMS,
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_size=ROOM_MAX_SIZE,
+        map_width=width,
+        map_height=height,
+        engine=engine,
+    ),
+    "bsp": lambda engine, width, height: procgen.generate_bsp_dungeon(
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_ratio=1.5,
+        map_width=width,
+        map_height=height,
+        engine=engine,
+    ),
+    "cave": lambda engine, width, height: procgen.generate_cave_dungeon(
+        map_width=width,
+        map_height=height,
+        engine=engine,
+    ),
+}
+
+DEFAULT_SIZES = ["80x43", "160x86", "320x172"]
+DEFAULT_FLOORS = [1, 4, 8]
+
+
+def new_engine(width: int, height: int, seed: int) -> Engine:
+    """Return an Engine with a player and a GameWorld, but no map yet."""
+    engine = Engine(player=entity_factories.player.clone())
+    engine.game_world = GameWorld(
+        engine=engine,
+        max_rooms=MAX_ROOMS,
+        room_min_size=ROOM_MIN_SIZE,
+        room_max_size=ROOM_MAX_SIZE,
+        map_width=width,
+        map_height=height,
+        seed=seed,
+    )
+    return engine
+
+
+def generate(engine: Engine, generator: str, floor: int) -> GameMap:
+    game_world = engine.game_world
+    game_world.current_floor = floor
+    game_world.seed_floor()
+    game_map = GENERATORS[generator](engine, game_world.map_width, game_world.map_height)
+    engine.game_map = game_map
+    return game_map
+
+
+def measure(generator: str, width: int, height: int, floor: int, runs: int, seed: int) -> Dict[str, Any]:
+    """Generate `runs` floors, each from its own seed, and summarize them."""
+    times: List[float] = []
+    peaks: List[int] = []
+    actors: List[int] = []
+    items: List[int] = []
+    for run in range(runs):
+        engine = new_engine(width, height, seed + run)
+
+        start = time.perf_counter()
+        game_map = generate(engine, generator, floor)
+        times.append(time.perf_counter() - start)
+
+        actors.append(sum(1 for entity in game_map.entities if isinstance(entity, Actor)) - 1)  # Minus the player.
+        items.append(sum(1 for entity in game_map.entities if isinstance(entity, Item)))
+
+        # tracemalloc slows allocation down a lot, so memory is measured on a separate identical run.
+        engine = new_engine(width, height, seed + run)
+        tracemalloc.start()
+        generate(engine, generator, floor)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        "generator": generator,
+        "width": width,
+        "height": height,
+        "floor": floor,
+        "runs": runs,
+        "time_ms": {
+            "min": min(times) * 1000,
+            "median": statistics.median(times) * 1000,
+            "max": max(times) * 1000,
+        },
+        "peak_memory_kib": {"median": statistics.median(peaks) / 1024, "max": max(peaks) / 1024},
+        "monsters": {"mean": statistics.mean(actors), "max": max(actors)},
+        "items": {"mean": statistics.mean(items), "max": max(items)},
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_size(size: str) -> Tuple[int, int]:
+    width, height = size.lower().split("x")
+    return int(width), int(height)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="floors generated per combination")
+    parser.add_argument("--generators", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, metavar="WxH")
+    parser.add_argument("--floors", nargs="+", type=int, default=DEFAULT_FLOORS)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run, later runs add 1 each")
+    parser.add_argument("--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'generator':<10}{'size':>9}{'floor':>6}{'median (ms)':>13}{'peak (KiB)':>12}{'monsters':>10}{'items':>7}")
+    for generator in args.generators:
+        for size in args.sizes:
+            width, height = parse_size(size)
+            for floor in args.floors:
+                result = measure(generator, width, height, floor, args.runs, args.seed)
+                results.append(result)
+                print(
+                    f"{generator:<10}{size:>9}{floor:>6}{result['time_ms']['median']:>13.2f}"
+                    f"{result['peak_memory_kib']['median']:>12.0f}{result['monsters']['mean']:>10.1f}"
+                    f"{result['items']['mean']:>7.1f}"
+                )
+
+    if args.output:
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
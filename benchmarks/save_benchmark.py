@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare save and load time and file size of the save format against pickling the whole Engine.
+
+Run from the project root:  python benchmarks/save_benchmark.py
+"""
+
+from typing import Callable
+import lzma
+import os
+import pickle
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from engine import Engine  # noqa: E402
+import actions  # noqa: E402
+import input_handlers  # noqa: E402
+import serialization  # noqa: E402
+import setup_game  # noqa: E402
+
+
+def play(engine: Engine, turns: int, floors: int) -> None:
+    """Wander randomly so that the message log and explored area look like a real game."""
+    handler = input_handlers.MainGameEventHandler(engine)
+    for turn in range(turns):
+        if turn % (turns // floors) == 0:
+            engine.game_world.generate_floor()
+            engine.update_fov()
+        direction = random.choice([(-1, 0), (1, 0), (0, -1), (0, 1)])
+        handler.handle_action(actions.BumpAction(engine.player, *direction))
+
+
+def legacy_save(engine: Engine, filename: str) -> None:
+    with open(filename, "wb") as f:
+        f.write(lzma.compress(pickle.dumps(engine)))
+
+
+def legacy_load(filename: str) -> Engine:
+    with open(filename, "rb") as f:
+        engine: Engine = pickle.loads(lzma.decompress(f.read()))
+    return engine
+
+
+def best_time(function: Callable[[], object], number: int = 5) -> float:
+    """Return the best time per call in milliseconds."""
+    return min(timeit.repeat(function, number=1, repeat=number)) * 1000
+
+
+def main(turns: int = 1000, floors: int = 5) -> None:
+    random.seed(0)
+    engine = setup_game.new_game()
+    play(engine, turns, floors)
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_file = os.path.join(directory, "legacy.sav")
+        save_file = os.path.join(directory, "new.sav")
+
+        results = {
+            "pickle": (
+                best_time(lambda: legacy_save(engine, legacy_file)),
+                best_time(lambda: legacy_load(legacy_file)),
+                os.path.getsize(legacy_file),
+            ),
+            f"format {serialization.SAVE_VERSION}": (
+                best_time(lambda: engine.save_as(save_file)),
+                best_time(lambda: serialization.load_engine(save_file)),
+                os.path.getsize(save_file),
+            ),
+        }
+
+    print(f"{len(engine.game_map.entities)} entities, {len(engine.message_log.messages)} messages")
+    print(f"{'format':<10}{'save (ms)':>11}{'load (ms)':>11}{'size (bytes)':>14}")
+    for name, (save_time, load_time, size) in results.items():
+        print(f"{name:<10}{save_time:>11.1f}{load_time:>11.1f}{size:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Compare the cost of spawning each entity prototype with Entity.clone against copy.deepcopy.
+
+Run from the project root:  python benchmarks/spawn_benchmark.py
+"""
+
+from typing import Callable, Dict
+import copy
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from entity import Actor, Entity  # noqa: E402
+from game_map import GameMap  # noqa: E402
+import entity_factories  # noqa: E402
+
+
+def time_per_call(function: Callable[[], object], number: int) -> float:
+    """Return the best time per call in microseconds."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1_000_000
+
+
+def main(number: int = 200) -> None:
+    gamemap = GameMap(None, 10, 10)  # type: ignore
+
+    prototypes: Dict[str, Entity] = {
+        name: value for name, value in entity_factories.prototypes.items() if isinstance(value, Actor)
+    }
+    prototypes["health_potion"] = entity_factories.health_potion
+    prototypes["human_eye"] = entity_factories.human_eye
+
+    print(f"{'prototype':<16}{'deepcopy (us)':>14}{'spawn (us)':>12}{'speedup':>9}")
+    for name, prototype in prototypes.items():
+
+        def spawn(prototype: Entity = prototype) -> None:
+            gamemap.remove_entity(prototype.spawn(gamemap, 0, 0))
+
+        deepcopy_time = time_per_call(lambda: copy.deepcopy(prototype), number)
+        spawn_time = time_per_call(spawn, number)
+        print(f"{name:<16}{deepcopy_time:>14.1f}{spawn_time:>12.1f}{deepcopy_time / spawn_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Measure how long the game takes to reach its first frame, and which imports that time goes to.
+
+Each run starts a fresh interpreter which imports `main`, loads the tileset and renders the main menu to an
+offscreen console, so no window is needed.  With --max-ms the exit status is 1 when the median time to the
+first frame is over that limit, for use in CI.
+
+Run from the project root:  python benchmarks/startup_benchmark.py --output startup.json
+"""
+
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+FIRST_FRAME = """
+import time
+start = time.perf_counter()
+import tcod
+import main
+tileset = main.load_tileset()
+console = tcod.console.Console(80, 50, order="F")
+main.setup_game.MainMenu().on_render(console)
+print(time.perf_counter() - start)
+"""
+
+
+def run_first_frame() -> Tuple[float, float]:
+    """Return the seconds to the first frame including and excluding interpreter startup."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", FIRST_FRAME],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return time.perf_counter() - start, float(result.stdout.strip().splitlines()[-1])
+
+
+def import_times() -> List[Dict[str, Any]]:
+    """Return the self and cumulative import time of every module imported by `main`, from `-X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+    return modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="number of modules to list")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--max-ms", type=float, help="fail if the median time to the first frame is over this")
+    args = parser.parse_args()
+
+    runs = [run_first_frame() for _ in range(args.runs)]
+    process_ms = statistics.median(run[0] for run in runs) * 1000
+    first_frame_ms = statistics.median(run[1] for run in runs) * 1000
+    modules = import_times()
+
+    print(f"first frame: {first_frame_ms:.0f} ms after the interpreter started, {process_ms:.0f} ms in total")
+    print(f"\n{'module':<40}{'self (ms)':>11}{'cumulative (ms)':>17}")
+    for module in sorted(modules, key=lambda module: -module["self_ms"])[: args.top]:
+        print(f"{module['module']:<40}{module['self_ms']:>11.1f}{module['cumulative_ms']:>17.1f}")
+    print("\nproject modules:")
+    for module in modules:
+        if os.path.exists(os.path.join(PROJECT_ROOT, *module["module"].split(".")) + ".py"):
+            indent = "  " * module["depth"]
+            print(f"{indent}{module['module']:<{40 - len(indent)}}{module['cumulative_ms']:>11.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"first_frame_ms": first_frame_ms, "process_ms": process_ms, "imports": modules}, f, indent=2)
+
+    if args.max_ms is not None and first_frame_ms > args.max_ms:
+        print(f"\nFirst frame took {first_frame_ms:.0f} ms, over the limit of {args.max_ms:.0f} ms.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+
+class Camera:
+    """The window of the map which is drawn on screen.
+
+    `x` and `y` are the map coordinates of the top left corner of the window, which is drawn at the top left
+    corner of the console.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+
+    def center_on(self, x: int, y: int, map_width: int, map_height: int) -> None:
+        """Center the window on a map position, without scrolling past the edges of the map."""
+        self.x = max(0, min(x - self.width // 2, map_width - self.width))
+        self.y = max(0, min(y - self.height // 2, map_height - self.height))
+
+    def view(self, map_width: int, map_height: int) -> Tuple[slice, slice]:
+        """Return the slices of a map array which are inside of the window."""
+        return (
+            slice(self.x, min(self.x + self.width, map_width)),
+            slice(self.y, min(self.y + self.height, map_height)),
+        )
+
+    def in_view(self, x: int, y: int) -> bool:
+        """Return True if this map position is inside of the window."""
+        return 0 <= x - self.x < self.width and 0 <= y - self.y < self.height
+
+    def map_to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        return x - self.x, y - self.y
+
+    def screen_to_map(self, x: int, y: int) -> Tuple[int, int]:
+        return x + self.x, y + self.y
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING, List, Optional, Tuple
-import random
+import copy
 
 import numpy as np
 import tcod
@@ -16,6 +16,18 @@ class BaseAI(Action):
     def perform(self) -> None:
         raise NotImplementedError()
 
+    def fast_forward(self, turns: int) -> None:
+        """Catch up on `turns` turns skipped while dormant, without taking each of them.
+
+        Called before `perform` when the actor becomes active again.  By default nothing happens.
+        """
+
+    def clone(self, entity: Actor) -> BaseAI:
+        """Return a copy of this AI controlling `entity`."""
+        clone = copy.copy(self)
+        clone.entity = entity
+        return clone
+
     def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         """Compute and return a path to the target position.
 
@@ -24,14 +36,11 @@ def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         # Copy the walkable array.
         cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
 
-        for entity in self.entity.gamemap.entities:
-            # Check that an enitiy blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += 10
+        # Add to the cost of a position blocked by an entity, unless the tile itself blocks.
+        # A lower number means more enemies will crowd behind each other in
+        # hallways.  A higher number means enemies will take longer paths in
+        # order to surround the player.
+        cost[self.entity.gamemap.blocked & (cost > 0)] += 10
 
         # Create a graph from the cost array and pass that graph to a new pathfinder.
         graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
@@ -45,12 +54,46 @@ def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
         # Convert from List[List[int]] to List[Tuple[int, int]].
         return [(index[0], index[1]) for index in path]
 
+    def get_path_to_player(self) -> List[Tuple[int, int]]:
+        """Return a path to the player by descending the engine's shared distance map.
+
+        If there is no valid path, or this actor is outside of the area the map covers, then returns an empty list.
+        """
+        distance = self.engine.get_player_distance_map()
+        origin_x, origin_y = self.engine.player_distance_origin
+        x, y = self.entity.x - origin_x, self.entity.y - origin_y
+        if not (0 <= x < distance.shape[0] and 0 <= y < distance.shape[1]):
+            return []  # Too far from the player.
+        if distance[x, y] == np.iinfo(distance.dtype).max:
+            return []  # The player is unreachable from here.
+
+        # Walk downhill from this actor and remove the starting point.
+        path: List[List[int]] = tcod.path.hillclimb2d(distance, (x, y), cardinal=True, diagonal=True)[1:].tolist()
+
+        return [(index[0] + origin_x, index[1] + origin_y) for index in path]
+
 
 class HostileEnemy(BaseAI):
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
 
+    def clone(self, entity: Actor) -> HostileEnemy:
+        return HostileEnemy(entity)
+
+    def fast_forward(self, turns: int) -> None:
+        """Jump along the path this enemy was following, if the end of that jump is still free."""
+        if not self.path:
+            return
+        steps = min(turns, len(self.path))
+        dest_x, dest_y = self.path[steps - 1]
+        gamemap = self.entity.gamemap
+        if gamemap.tiles["walkable"][dest_x, dest_y] and not gamemap.get_blocking_entity_at_location(dest_x, dest_y):
+            self.entity.place(dest_x, dest_y)
+            del self.path[:steps]
+        else:
+            self.path = []
+
     def perform(self) -> None:
         target = self.engine.player
         dx = target.x - self.entity.x
@@ -61,7 +104,7 @@ def perform(self) -> None:
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            self.path = self.get_path_to_player()
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
@@ -86,6 +129,9 @@ def __init__(self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining
         self.previous_ai = previous_ai
         self.turns_remaining = turns_remaining
 
+    def fast_forward(self, turns: int) -> None:
+        self.turns_remaining = max(0, self.turns_remaining - turns)
+
     def perform(self) -> None:
         # Revert the AI back to the original state if the effect has run its course.
         if self.turns_remaining <= 0:
@@ -93,7 +139,7 @@ def perform(self) -> None:
             self.entity.ai = self.previous_ai
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.engine.game_world.rng.choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -128,10 +174,10 @@ def __init__(self, entity: Actor):
     def perform(self) -> None:
         # Revert the AI back to the original state if the effect has run its course.
 
-        if random.random() < 0.333:
+        if self.engine.game_world.rng.random() < 0.333:
             return WaitAction(self.entity)
         
-        direction_x, direction_y = random.choice(
+        direction_x, direction_y = self.engine.game_world.rng.choice(
             [
                 (-1, -1),  # Northwest
                 (0, -1),  # North
@@ -154,14 +200,17 @@ def perform(self) -> None:
         ).perform()
 
 class FleeingNeutral(BaseAI):
-    def __init__(self, entity: Actor, bully: Actor, previous_ai: Optional[BaseAI], turns_remaining: int):
+    def __init__(self, entity: Actor, bully: Optional[Actor], previous_ai: Optional[BaseAI], turns_remaining: int):
         super().__init__(entity)
-        self.bully = bully
+        self.bully = bully  # None once the bully has left the map.
         self.previous_ai = previous_ai
         self.turns_remaining = turns_remaining
 
+    def fast_forward(self, turns: int) -> None:
+        self.turns_remaining = max(0, self.turns_remaining - turns)
+
     def perform(self) -> None:
-        if self.turns_remaining <= 0:
+        if self.turns_remaining <= 0 or self.bully is None:
             self.entity.ai = self.previous_ai
         else:
             if self.bully.y < self.entity.y:
@@ -174,7 +223,7 @@ def perform(self) -> None:
                 dx = -1
 
             if not self.entity.gamemap.in_bounds(self.entity.x + dx, self.entity.y + dy) or not self.entity.gamemap.tiles["walkable"][self.entity.x + dx, self.entity.y + dy]:
-                if random.random() < 0.5:
+                if self.engine.game_world.rng.random() < 0.5:
                     dx = 0
                 else:
                     dy = 0
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, TypeVar
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
+T = TypeVar("T", bound="BaseComponent")
+
 
 class BaseComponent:
     parent: Entity  # Owning entity instance.
@@ -18,3 +20,13 @@ def gamemap(self) -> GameMap:
     @property
     def engine(self) -> Engine:
         return self.gamemap.engine
+
+    def clone(self: T) -> T:
+        """Return a copy of this component for a newly spawned entity.
+
+        The caller is responsible for setting the `parent` of the copy.
+        Components holding mutable state must override this.
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        return clone
@@ -1,83 +1,180 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+import numpy as np
 
 from components.base_component import BaseComponent
-from components.part import Part
-import copy
+from components.part import SPEC_TABLE_COLUMNS, Part, get_part_spec_table
 
 if TYPE_CHECKING:
     from entity import Actor,Item
 
+STAT_NAMES = (
+    "defense_bonus",
+    "power_bonus",
+    "health_bonus",
+    "max_health_bonus",
+    "mental_strength_bonus",
+    "spiritual_defense_bonus",
+    "spiritual_power_bonus",
+    "vision_radius",
+    "legs",
+)
+MAX_HEALTH = SPEC_TABLE_COLUMNS.index("health_bonus")
+
 # collection of parts, has no attributes besides its parts
 class Body(BaseComponent):
+    """The parts of an actor, stored as the spec id and current health of each part.
+
+    Parts only get an Item of their own when they are looked at through `parts` or `part_at`, or when they were
+    attached from an Item, so spawning an actor doesn't copy an Item per part.
+    """
+
     parent: Actor
 
-    def __init__(self, parts: List[Item] = None, max_parts: int = 12):
-        self.parts: List[Part] = []
-        for part in parts:
-            self.parts.append(copy.deepcopy(part.part))
+    def __init__(self, parts: Sequence[Item] = (), max_parts: int = 12):
+        specs = []
+        for item in parts:
+            assert item.part, f"{item.name} is not a part."
+            specs.append((item.part.spec_id, item.part.current_health))
+        self.spec_ids = np.array([spec_id for spec_id, _ in specs], dtype=np.int16)
+        self.current_health = np.array([health for _, health in specs], dtype=np.int16)
+        self.items: List[Optional[Item]] = [None] * len(parts)  # The Item of each part, if it has one yet.
         self.max_parts = max_parts
+        self._stats: Optional[Dict[str, int]] = None
 
+    @property
+    def part_count(self) -> int:
+        return len(self.items)
 
     @property
-    def defense_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.defense_bonus
+    def parts(self) -> List[Part]:
+        """Every part, each with an Item of its own."""
+        return [self.part_at(index) for index in range(self.part_count)]
+
+    def part_at(self, index: int) -> Part:
+        """Return the part at `index`, giving it an Item of its own if it has none yet."""
+        item = self.items[index]
+        if item is None:
+            import entity_factories
 
-        return bonus
+            item = self.items[index] = entity_factories.part_prototypes[int(self.spec_ids[index])].clone()
+        assert item.part
+        item.part.current_health = int(self.current_health[index])
+        return item.part
+
+    def index_of(self, part: Part) -> int:
+        for index, item in enumerate(self.items):
+            if item is not None and item is part.parent:
+                return index
+        raise ValueError(f"{part.parent.name} is not part of this body.")
+
+    def part_name(self, index: int) -> str:
+        import entity_factories
+
+        item = self.items[index] or entity_factories.part_prototypes[int(self.spec_ids[index])]
+        return item.name
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return the summed bonuses of every part, recomputed only after invalidate_stats."""
+        if self._stats is None:
+            (
+                defense_bonus,
+                power_bonus,
+                max_health_bonus,
+                mental_bonus,
+                spiritual_defense_bonus,
+                spiritual_power_bonus,
+                eyes,
+                legs,
+                dark_vision,
+            ) = get_part_spec_table()[self.spec_ids].sum(axis=0).tolist()
+            self._stats = {
+                "defense_bonus": defense_bonus,
+                "power_bonus": power_bonus,
+                "health_bonus": int(self.current_health.sum()),
+                "max_health_bonus": max_health_bonus,
+                "mental_strength_bonus": mental_bonus,
+                "spiritual_defense_bonus": spiritual_defense_bonus,
+                "spiritual_power_bonus": spiritual_power_bonus,
+                "vision_radius": 4 * eyes + (2 if dark_vision else 0),
+                "legs": legs,
+            }
+        return self._stats
+
+    def invalidate_stats(self) -> None:
+        """Drop the cached bonuses.  Call after changing the parts or their health."""
+        self._stats = None
+
+    def clone(self) -> Body:
+        clone = super().clone()  # The stat cache is replaced, never changed, so it can be shared.
+        clone.spec_ids = self.spec_ids.copy()
+        clone.current_health = self.current_health.copy()
+        clone.items = [None] * self.part_count  # Parts get their own Items when they are needed.
+        return clone
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the stat cache out of saves and copies."""
+        state = self.__dict__.copy()
+        state["_stats"] = None
+        return state
+
+    @property
+    def defense_bonus(self) -> int:
+        return self.stats["defense_bonus"]
 
     @property
     def power_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.power_bonus
+        return self.stats["power_bonus"]
 
-        return bonus
-    
     @property
     def health_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.current_health
+        return self.stats["health_bonus"]
 
-        return bonus
-    
     @property
     def max_health_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.health_bonus
-
-        return bonus
+        return self.stats["max_health_bonus"]
 
     @property
     def mental_strength_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.mental_bonus
-
-        return bonus
+        return self.stats["mental_strength_bonus"]
 
     @property
     def spiritual_defense_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.spiritual_defense_bonus
+        return self.stats["spiritual_defense_bonus"]
 
-        return bonus
-    
     @property
     def spiritual_power_bonus(self) -> int:
-        bonus = 0
-        for part in self.parts:
-            bonus += part.spiritual_power_bonus
+        return self.stats["spiritual_power_bonus"]
+
+    @property
+    def vision_radius(self) -> int:
+        """Each eye adds 4 tiles of vision, and any part with dark vision adds 2 more."""
+        return self.stats["vision_radius"]
 
-        return bonus
+    @property
+    def speed(self) -> int:
+        """100 on two legs, and a quarter more or less for each leg above or below that, down to 50."""
+        return 50 + 25 * self.stats["legs"]
+
+    def add_part(self, part: Part) -> None:
+        self.spec_ids = np.append(self.spec_ids, part.spec_id).astype(np.int16)
+        self.current_health = np.append(self.current_health, part.current_health).astype(np.int16)
+        self.items.append(part.parent)
+        self.invalidate_stats()
+
+    def remove_part(self, part: Part) -> None:
+        index = self.index_of(part)
+        part.current_health = int(self.current_health[index])
+        self.spec_ids = np.delete(self.spec_ids, index)
+        self.current_health = np.delete(self.current_health, index)
+        del self.items[index]
+        self.invalidate_stats()
 
     def part_equipped(self, part: Part) -> bool:
-        return part in self.parts
+        return any(item is part.parent for item in self.items)
 
     def unequip_message(self, part_name: str) -> None:
         self.parent.gamemap.engine.message_log.add_message(f"You remove the {part_name}.")
@@ -90,11 +187,11 @@ def full_message(self) -> None:
 
 
     def equip(self, part: Part, add_message: bool) -> None:
-        if len(self.parts) >= self.max_parts:
+        if self.part_count >= self.max_parts:
             self.full_message
             return
             
-        self.parts.append(part)
+        self.add_part(part)
 
         if self.parent.inventory:
             if part.parent in self.parent.inventory.items:
@@ -104,7 +201,7 @@ def equip(self, part: Part, add_message: bool) -> None:
             self.equip_message(part.parent.name)
 
     def unequip(self, part: Part, add_message: bool) -> None:
-        self.parts.remove(part)
+        self.remove_part(part)
         if len(self.parent.inventory.items) < self.parent.inventory.capacity:
             self.parent.inventory.items.append(part.parent)
         else:
@@ -113,29 +210,41 @@ def unequip(self, part: Part, add_message: bool) -> None:
             self.unequip_message(part.parent.name)
 
     def toggle_equip(self, part: Part, add_message: bool = True) -> None:
-        if part in self.parts:
+        if self.part_equipped(part):
             self.unequip(part, add_message)
         else:
             self.equip(part, add_message)
     
     def set_health(self, value: int) -> None:
+        """Spread a change of the total health of the parts over the parts, and log one line of what changed.
+
+        Parts are filled or drained in body order: damage empties the first part with health before touching the
+        next one, and healing fills the first part which isn't full before the next one.
+        """
         change = value - self.health_bonus
-        for part in self.parts:
-            #positive try to get to max, negative try to get to 0
-            if change == 0:
-                return
-            part_change = 0
-            if change < 0:
-                part_change = max(-part.current_health, change)
-            else:
-                part_change = min(part.health_bonus - part.current_health, change) 
-            part.current_health += part_change
-            change -= part_change
-            if (part.health_bonus > 0):
-                self.engine.message_log.add_message(f"{part.parent.name} max: {part.health_bonus}, current: {part.current_health}.")
-    
+        if change == 0:
+            return
+        current_health = self.current_health.astype(np.int32)
+        if change < 0:
+            available = current_health
+        else:
+            available = get_part_spec_table()[self.spec_ids, MAX_HEALTH] - current_health
+        # Each part takes what is left of the change after the parts before it, up to what it has available.
+        before = np.cumsum(available) - available
+        part_changes = np.clip(abs(change) - before, 0, available) * np.sign(change)
+        self.current_health = (current_health + part_changes).astype(np.int16)
+        self.invalidate_stats()
+
+        changed = np.nonzero(part_changes)[0].tolist()
+        if changed:
+            max_health = get_part_spec_table()[self.spec_ids, MAX_HEALTH]
+            summary = ", ".join(
+                f"{self.part_name(index)} {self.current_health[index]}/{max_health[index]}" for index in changed
+            )
+            self.engine.message_log.add_message(f"{self.parent.name}: {summary}.")
+
     def drop(self, part: Part) -> None:
-        self.parts.remove(part)
+        self.remove_part(part)
         part.parent.place(self.parent.x, self.parent.y, self.gamemap)
 
         self.engine.message_log.add_message(f"{self.parent.name} dropped a {part.parent.name}.")
@@ -89,16 +89,14 @@ def activate(self, action: actions.ItemAction) -> None:
         if not self.engine.game_map.visible[target_xy]:
             raise Impossible("You cannot target an area that you cannot see.")
 
-        targets_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
-                )
-                actor.fighter.take_damage(self.damage)
-                targets_hit = True
-
-        if not targets_hit:
+        targets = self.engine.game_map.actors_in_radius(*target_xy, self.radius)
+        for actor in targets:
+            self.engine.message_log.add_message(
+                f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
+            )
+            actor.fighter.take_damage(self.damage)
+
+        if not targets:
             raise Impossible("There are no targets in the radius.")
         self.consume()
 
@@ -128,16 +126,8 @@ def __init__(self, damage: int, maximum_range: int):
 
     def activate(self, action: actions.ItemAction) -> None:
         consumer = action.entity
-        target = None
-        closest_distance = self.maximum_range + 1.0
-
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        game_map = self.engine.game_map
+        target = game_map.nearest_actor(consumer.x, consumer.y, self.maximum_range, game_map.visible, exclude=consumer)
 
         if target:
             self.engine.message_log.add_message(
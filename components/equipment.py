@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from components.base_component import BaseComponent
 from equipment_types import EquipmentType
@@ -8,6 +8,8 @@
 if TYPE_CHECKING:
     from entity import Actor, Item
 
+STAT_NAMES = ("defense_bonus", "power_bonus", "spiritual_defense_bonus", "spiritual_power_bonus")
+
 
 class Equipment(BaseComponent):
     parent: Actor
@@ -15,54 +17,60 @@ class Equipment(BaseComponent):
     def __init__(self, weapon: Optional[Item] = None, armor: Optional[Item] = None):
         self.weapon = weapon
         self.armor = armor
+        self._stats: Optional[Dict[str, int]] = None
 
     @property
-    def defense_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.defense_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.defense_bonus
+    def stats(self) -> Dict[str, int]:
+        """Return the summed bonuses of the equipped items, recomputed only after invalidate_stats."""
+        if self._stats is None:
+            stats = dict.fromkeys(STAT_NAMES, 0)
+            for item in (self.weapon, self.armor):
+                if item is not None and item.equippable is not None:
+                    stats["defense_bonus"] += item.equippable.defense_bonus
+                    stats["power_bonus"] += item.equippable.power_bonus
+                    stats["spiritual_defense_bonus"] += item.equippable.spiritual_defense_bonus
+                    stats["spiritual_power_bonus"] += item.equippable.spiritual_power_bonus
+            self._stats = stats
+        return self._stats
+
+    def invalidate_stats(self) -> None:
+        """Drop the cached bonuses.  Call after changing the equipped items."""
+        self._stats = None
+
+    def clone(self, items: Optional[Dict[Item, Item]] = None) -> Equipment:
+        """Return a copy of this component.
+
+        `items` maps already copied inventory items to their copies, so that equipped items stay shared.
+        """
+        items = items or {}
+        clone = Equipment()
+        for slot in ("weapon", "armor"):
+            item = getattr(self, slot)
+            if item is not None:
+                setattr(clone, slot, items[item] if item in items else item.clone())
+        return clone
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the stat cache out of saves and copies."""
+        state = self.__dict__.copy()
+        state["_stats"] = None
+        return state
 
-        return bonus
+    @property
+    def defense_bonus(self) -> int:
+        return self.stats["defense_bonus"]
 
     @property
     def power_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.power_bonus
+        return self.stats["power_bonus"]
 
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.power_bonus
-
-        return bonus
-    
     @property
     def spiritual_defense_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.spiritual_defense_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.spiritual_defense_bonus
-
-        return bonus
+        return self.stats["spiritual_defense_bonus"]
 
     @property
     def spiritual_power_bonus(self) -> int:
-        bonus = 0
-
-        if self.weapon is not None and self.weapon.equippable is not None:
-            bonus += self.weapon.equippable.spiritual_power_bonus
-
-        if self.armor is not None and self.armor.equippable is not None:
-            bonus += self.armor.equippable.spiritual_power_bonus
-
-        return bonus
+        return self.stats["spiritual_power_bonus"]
 
     def item_is_equipped(self, item: Item) -> bool:
         return self.weapon == item or self.armor == item
@@ -80,6 +88,7 @@ def equip_to_slot(self, slot: str, item: Item, add_message: bool) -> None:
             self.unequip_from_slot(slot, add_message)
 
         setattr(self, slot, item)
+        self.invalidate_stats()
 
         if add_message:
             self.equip_message(item.name)
@@ -97,6 +106,7 @@ def unequip_from_slot(self, slot: str, add_message: bool) -> None:
             current_item.place(self.parent.x, self.parent.y,self.gamemap)
 
         setattr(self, slot, None)
+        self.invalidate_stats()
 
     def toggle_equip(self, equippable_item: Item, add_message: bool = True) -> None:
         if equippable_item.equippable and equippable_item.equippable.equipment_type == EquipmentType.WEAPON:
@@ -4,7 +4,6 @@
 
 from components.base_component import BaseComponent
 from render_order import RenderOrder
-import random
 import color
 
 if TYPE_CHECKING:
@@ -142,20 +141,21 @@ def die(self) -> None:
 
         self.engine.message_log.add_message(death_message, death_message_color)
         
+        rng = self.engine.game_world.rng
         if self.parent.loot_table:
             if self.parent.inventory:
                 for _ in range(self.parent.loot_table.inventory_rolls):
                     if len(self.parent.inventory.items) > 0:
-                        if random.random() < self.parent.loot_table.inventory_chance:
-                            ind = random.randint(0, len(self.parent.inventory.items) - 1)
+                        if rng.random() < self.parent.loot_table.inventory_chance:
+                            ind = rng.randint(0, len(self.parent.inventory.items) - 1)
                             if self.parent.inventory.items[ind].stack:
-                                self.parent.inventory.items[ind].stack.stack = int(self.parent.inventory.items[ind].stack.stack * (0.8 + random.random() * 0.8))
+                                self.parent.inventory.items[ind].stack.stack = int(self.parent.inventory.items[ind].stack.stack * (0.8 + rng.random() * 0.8))
                             self.parent.inventory.drop(self.parent.inventory.items[ind])
             if self.parent.body:
                 for _ in range(self.parent.loot_table.body_rolls):
-                    if len(self.parent.body.parts) > 0:
-                        if random.random() < self.parent.loot_table.body_chance:
-                            self.parent.body.drop(self.parent.body.parts[random.randint(0, len(self.parent.body.parts) - 1)])
+                    if self.parent.body.part_count > 0:
+                        if rng.random() < self.parent.loot_table.body_chance:
+                            self.parent.body.drop(self.parent.body.part_at(rng.randint(0, self.parent.body.part_count - 1)))
                         
         self.parent.name = f"remains of {self.parent.name}"
 
@@ -14,7 +14,14 @@ class Inventory(BaseComponent):
     def __init__(self, capacity: int, items: List[Item] = []):
         self.capacity = capacity
         self.items = items
-    
+
+    def clone(self) -> Inventory:
+        clone = Inventory(capacity=self.capacity, items=[])
+        for item in self.items:
+            item_clone = item.clone()
+            item_clone.parent = clone
+            clone.items.append(item_clone)
+        return clone
 
     def drop(self, item: Item) -> None:
         """
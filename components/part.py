@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
+
+import numpy as np
 
 from components.base_component import BaseComponent
 from part_types import PartType
@@ -10,7 +12,76 @@
     from entity import Item
 
 
+class PartSpec(NamedTuple):
+    """The stats of one kind of part, shared by every part of that kind."""
+
+    kind: str  # Name of the Part subclass, so that kinds with the same stats stay apart.
+    part_type: PartType
+    form: Form
+    health_bonus: int
+    mental_bonus: int
+    spiritual_defense_bonus: int
+    spiritual_power_bonus: int
+    power_bonus: int
+    defense_bonus: int
+    dark_vision: bool
+
+
+part_specs: List[PartSpec] = []
+part_spec_ids: Dict[PartSpec, int] = {}
+
+SPEC_TABLE_COLUMNS = (
+    "defense_bonus",
+    "power_bonus",
+    "health_bonus",
+    "mental_bonus",
+    "spiritual_defense_bonus",
+    "spiritual_power_bonus",
+    "eyes",
+    "legs",
+    "dark_vision",
+)
+_spec_table: Optional[np.ndarray] = None
+
+
+def get_part_spec_id(spec: PartSpec) -> int:
+    """Return the id of a spec, registering it the first time it is seen."""
+    global _spec_table
+    spec_id = part_spec_ids.get(spec)
+    if spec_id is None:
+        spec_id = part_spec_ids[spec] = len(part_specs)
+        part_specs.append(spec)
+        _spec_table = None
+    return spec_id
+
+
+def get_part_spec_table() -> np.ndarray:
+    """Return the SPEC_TABLE_COLUMNS of every spec as one row per spec id, for summing the stats of a body."""
+    global _spec_table
+    if _spec_table is None:
+        _spec_table = np.array(
+            [
+                (
+                    spec.defense_bonus,
+                    spec.power_bonus,
+                    spec.health_bonus,
+                    spec.mental_bonus,
+                    spec.spiritual_defense_bonus,
+                    spec.spiritual_power_bonus,
+                    spec.part_type == PartType.EYE,
+                    spec.part_type == PartType.LEG,
+                    spec.dark_vision,
+                )
+                for spec in part_specs
+            ],
+            dtype=np.int32,
+        ).reshape(-1, len(SPEC_TABLE_COLUMNS))
+    return _spec_table
+
+
 class Part(BaseComponent):
+    """A body part.  Only `current_health` is its own, every other stat is read from its shared spec."""
+
     parent: Item
 
     def __init__(
@@ -26,16 +97,61 @@ def __init__(
         dark_vision: bool = False,
         
     ):
-        self.part_type = part_type
-        self.form = form
-        self.health_bonus = health_bonus
+        self.spec_id = get_part_spec_id(
+            PartSpec(
+                type(self).__name__,
+                part_type,
+                form,
+                health_bonus,
+                mental_bonus,
+                spiritual_defense_bonus,
+                spiritual_power_bonus,
+                power_bonus,
+                defense_bonus,
+                dark_vision,
+            )
+        )
         self.current_health = health_bonus
-        self.mental_bonus = mental_bonus
-        self.spiritual_defense_bonus = spiritual_defense_bonus
-        self.spiritual_power_bonus = spiritual_power_bonus
-        self.power_bonus = power_bonus
-        self.defense_bonus = defense_bonus
-        self.dark_vision = dark_vision
+
+    @property
+    def spec(self) -> PartSpec:
+        return part_specs[self.spec_id]
+
+    @property
+    def part_type(self) -> PartType:
+        return self.spec.part_type
+
+    @property
+    def form(self) -> Form:
+        return self.spec.form
+
+    @property
+    def health_bonus(self) -> int:
+        return self.spec.health_bonus
+
+    @property
+    def mental_bonus(self) -> int:
+        return self.spec.mental_bonus
+
+    @property
+    def spiritual_defense_bonus(self) -> int:
+        return self.spec.spiritual_defense_bonus
+
+    @property
+    def spiritual_power_bonus(self) -> int:
+        return self.spec.spiritual_power_bonus
+
+    @property
+    def power_bonus(self) -> int:
+        return self.spec.power_bonus
+
+    @property
+    def defense_bonus(self) -> int:
+        return self.spec.defense_bonus
+
+    @property
+    def dark_vision(self) -> bool:
+        return self.spec.dark_vision
 
 # would be pretty cool if there were two seperate hemispheres...
 class Human_Brain(Part):
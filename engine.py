@@ -1,67 +1,167 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
-import lzma
-import pickle
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from tcod.console import Console
 from tcod.map import compute_fov
+import numpy as np
+import tcod
 
+from camera import Camera
 from message_log import MessageLog
+from scheduler import TurnScheduler, action_time
 import exceptions
+import profiler
 import render_functions
-from part_types import PartType
 
 if TYPE_CHECKING:
     from entity import Actor
     from game_map import GameMap, GameWorld
 
 
+PATHING_RADIUS = 64
+"""How far from the player enemies path towards them.  Bounds the cost of pathfinding on large maps."""
+
+ACTIVE_RADIUS = 20
+"""Actors further than this from the player are dormant, and skip their turns until the player comes near."""
+
+
 class Engine:
     game_map: GameMap
     game_world: GameWorld
 
     def __init__(self, player: Actor):
         self.message_log = MessageLog()
-        self.mouse_location = (0, 0)
+        self.mouse_location = (0, 0)  # In map coordinates.
+        self.camera = Camera(width=80, height=43)  # The screen above the message log and status bars.
         self.player = player
+        self.player_distance_map: Optional[np.ndarray] = None
+        self.player_distance_origin = (0, 0)  # Map position of player_distance_map[0, 0].
+        self.turn = 0  # The number of player turns so far.
+        self.time = 0  # The time of the player's current action, see scheduler.ACTION_TIME.
+        self.scheduler = TurnScheduler()
+        self.active_radius = ACTIVE_RADIUS
+        self.fov_key: Optional[Tuple[GameMap, int, int, int]] = None  # The inputs of the last FOV computation.
 
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
+        """Run every action of the actors near the player which is due before the player's next action.
+
+        How often an actor acts depends on its speed, see `scheduler.action_time`.
+        Actors returning from dormancy first catch up on the turns they skipped with `BaseAI.fast_forward`.
+        """
+        self.turn += 1
+        scheduler = self.scheduler
+        if scheduler.game_map is not self.game_map:
+            scheduler.reset(self.game_map)
+
+        active_actors = self.get_active_actors()
+        for actor in active_actors:
+            # Every active actor counts as present this turn, even one too slow to act in it, so that only
+            # turns spent outside of the active area are fast-forwarded.
+            dormant_turns = 0 if actor.last_turn is None else self.turn - actor.last_turn - 1
+            actor.last_turn = self.turn
+            if dormant_turns > 0 and actor.ai:
                 try:
-                    entity.ai.perform()
+                    actor.ai.fast_forward(dormant_turns)
                 except exceptions.Impossible:
-                    pass  # Ignore impossible action exceptions from AI.
+                    pass
+            if actor not in scheduler.scheduled:
+                # Newly active actors act now, unless their next action was already due later.
+                scheduler.add(actor, self.time if actor.next_time is None else max(self.time, actor.next_time))
+        active = set(active_actors)
+
+        player_next_time = self.time + action_time(self.player)
+        self.player_distance_map = None  # The player may have moved since the last turn.
+        for time, entity in scheduler.pop_due(player_next_time):
+            if entity not in active or not entity.ai:
+                continue  # Dormant or dead, dormant actors are scheduled again once they are near.
+            self.time = time
+            try:
+                with profiler.phase("ai", entity.ai):
+                    entity.ai.perform()
+            except exceptions.Impossible:
+                pass  # Ignore impossible action exceptions from AI.
+            if entity.ai:
+                scheduler.add(entity, time + action_time(entity))
+        self.time = player_next_time
+        self.player_distance_map = None  # Don't keep the array around between turns.
+
+    def get_active_actors(self) -> List[Actor]:
+        """Return the living actors within `active_radius` of the player, except the player, in turn order."""
+        game_map = self.game_map
+        area = self.area_around_player(self.active_radius)
+        actors = [actor for actor in game_map.actor_store.living_in_area(area) if actor is not self.player]
+        actors.sort(key=game_map.entities.__getitem__)
+        return actors
+
+    def get_player_distance_map(self) -> np.ndarray:
+        """Return a Dijkstra map of the distance to the player, shared by every actor this turn.
+
+        The map only covers the area within PATHING_RADIUS of the player, starting at `player_distance_origin`.
+        """
+        if self.player_distance_map is None:
+            area = self.area_around_player(PATHING_RADIUS)
+            self.player_distance_origin = area[0].start, area[1].start
+
+            cost = np.array(self.game_map.tiles["walkable"][area], dtype=np.int8)
+            # Add to the cost of a position blocked by an entity, unless the tile itself blocks.
+            # A lower number means more enemies will crowd behind each other in
+            # hallways.  A higher number means enemies will take longer paths in
+            # order to surround the player.
+            cost[self.game_map.blocked[area] & (cost > 0)] += 10
+
+            distance = tcod.path.maxarray(cost.shape, dtype=np.int32, order="F")
+            distance[self.player.x - area[0].start, self.player.y - area[1].start] = 0
+            tcod.path.dijkstra2d(distance, cost, cardinal=2, diagonal=3, out=distance)
+            self.player_distance_map = distance
+        return self.player_distance_map
+
+    def area_around_player(self, radius: int) -> Tuple[slice, slice]:
+        """Return the slices of the map within `radius` tiles of the player."""
+        return (
+            slice(max(0, self.player.x - radius), self.player.x + radius + 1),
+            slice(max(0, self.player.y - radius), self.player.y + radius + 1),
+        )
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the players point of view."""
+        """Recompute the visible area based on the players point of view.
+
+        Skipped when neither the map, the player's position nor their vision radius changed since the last call.
+        """
         #loaded tile / visible tile
-        vision_radius = 0
-        dark_bool = False
-        for part in self.player.body.parts:
-            if part.part_type == PartType.EYE:
-                vision_radius += 4
-            if part.dark_vision:
-                dark_bool = True
-        if dark_bool:
-            vision_radius += 2
-        
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=max(1,vision_radius),
-        )
-        self.game_map.loaded[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=max(8, vision_radius),
+        vision_radius = max(1, self.player.body.vision_radius)
+        loaded_radius = max(8, vision_radius)
+
+        fov_key = (self.game_map, self.player.x, self.player.y, vision_radius)
+        if fov_key == self.fov_key:
+            return
+        self.fov_key = fov_key
+
+        # Only the area within the loaded radius is touched, so the cost doesn't depend on the size of the map.
+        game_map = self.game_map
+        if game_map.fov_area is None:
+            game_map.loaded[:] = False
+            game_map.visible[:] = False
+        else:
+            game_map.loaded[game_map.fov_area] = False
+            game_map.visible[game_map.fov_area] = False
+        area = game_map.fov_area = self.area_around_player(loaded_radius)
+
+        # Compute the larger "loaded" area once, then cut the "visible" area out of it.
+        game_map.loaded[area] = compute_fov(
+            game_map.tiles["transparent"][area],
+            (self.player.x - area[0].start, self.player.y - area[1].start),
+            radius=loaded_radius,
         )
+        near = self.area_around_player(vision_radius)
+        game_map.visible[near] = game_map.loaded[near]
         # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[area] |= game_map.visible[area]
+        game_map.invalidate_render_cache()
 
     def render(self, console: Console) -> None:
-        self.game_map.render(console)
+        self.camera.center_on(self.player.x, self.player.y, self.game_map.width, self.game_map.height)
+        self.game_map.render(console, self.camera)
 
         self.message_log.render(console=console, x=21, y=45, width=40, height=5)
 
@@ -82,6 +182,6 @@ def render(self, console: Console) -> None:
 
     def save_as(self, filename: str) -> None:
         """Save this Engine instance as a compressed file."""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        import serialization
+
+        serialization.save_engine(self, filename)
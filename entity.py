@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING, Optional, Tuple, Type, TypeVar, Union
-import copy
 import math
 
 from render_order import RenderOrder
@@ -29,6 +28,7 @@ class Entity:
     """
 
     parent: Union[GameMap, Inventory]
+    prototype_id: Optional[str] = None  # Name of the entity_factories prototype this was copied from.
 
     def __init__(
         self,
@@ -53,31 +53,68 @@ def __init__(
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
 
+    @property
+    def render_order(self) -> RenderOrder:
+        return self._render_order
+
+    @render_order.setter
+    def render_order(self, value: RenderOrder) -> None:
+        self._render_order = value
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.entities_sorted_for_rendering = None
+            self.gamemap.actor_store.update(self)
+
+    @property
+    def blocks_movement(self) -> bool:
+        return self._blocks_movement
+
+    @blocks_movement.setter
+    def blocks_movement(self, value: bool) -> None:
+        self._blocks_movement = value
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.update_blocked(self.x, self.y)
+            self.gamemap.actor_store.update(self)
+
+    def clone(self: T) -> T:
+        """Return a copy of this entity with its own copies of every component.
+
+        The copy has no location or parent, use `spawn` to put a copy on a map.
+        """
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.__dict__.pop("parent", None)
+        return clone
+
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """Place this entitiy at a new location.  Handles moving across GameMaps."""
-        self.x = x
-        self.y = y
         if gamemap:
             if hasattr(self, "parent"):  # Possibly uninitialized.
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+                if self.parent is self.gamemap and self in self.gamemap.entities:
+                    self.gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        elif hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.move_entity(self, x, y)
+        else:
+            self.x = x
+            self.y = y
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -87,8 +124,7 @@ def distance(self, x: int, y: int) -> float:
 
     def move(self, dx: int, dy: int) -> None:
         # Move the entity by a given amount
-        self.x += dx
-        self.y += dy
+        self.place(self.x + dx, self.y + dy)
 
 
 class Actor(Entity):
@@ -120,7 +156,9 @@ def __init__(
             description=description,
         )
 
-        self.ai: Optional[BaseAI] = ai_cls(self)
+        self.ai = ai_cls(self)
+        self.last_turn: Optional[int] = None  # The last Engine.turn this actor was active in, None if it never was.
+        self.next_time: Optional[int] = None  # When this actor acts next, see Engine.handle_enemy_turns.
 
         self.equipment: Equipment = equipment
         self.equipment.parent = self
@@ -140,6 +178,35 @@ def __init__(
         self.loot_table = loot_table
         self.loot_table.parent = self
 
+    def clone(self) -> Actor:
+        clone = super().clone()
+
+        clone.ai = self.ai.clone(clone) if self.ai else None
+
+        clone.inventory = self.inventory.clone()
+        clone.inventory.parent = clone
+
+        items = dict(zip(self.inventory.items, clone.inventory.items))
+        clone.equipment = self.equipment.clone(items)
+        clone.equipment.parent = clone
+
+        for name in ("fighter", "level", "body", "loot_table"):
+            component = getattr(self, name).clone()
+            component.parent = clone
+            setattr(clone, name, component)
+
+        return clone
+
+    @property
+    def ai(self) -> Optional[BaseAI]:
+        return self._ai
+
+    @ai.setter
+    def ai(self, value: Optional[BaseAI]) -> None:
+        self._ai = value
+        if hasattr(self, "parent") and self.parent is self.gamemap:
+            self.gamemap.actor_store.update(self)
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
@@ -191,4 +258,16 @@ def __init__(
 
         if self.stack:
             self.stack.parent = self
+
+    def clone(self) -> Item:
+        clone = super().clone()
+
+        for name in ("consumable", "equippable", "part", "stack"):
+            component = getattr(self, name)
+            if component:
+                component = component.clone()
+                component.parent = clone
+                setattr(clone, name, component)
+
+        return clone
         
@@ -1,3 +1,5 @@
+from typing import Dict
+
 from components import consumable, equippable, part
 from components.ai import HostileEnemy, Neutral
 from components.equipment import Equipment
@@ -8,7 +10,7 @@
 from components.loot_table import LootTable
 from components.stackable import Stackable
 import color
-from entity import Actor, Item
+from entity import Actor, Entity, Item
 
 human_heart = Item(char="q", color=color.red, name="Human Heart", part=part.Human_Heart(), description=
     """
@@ -418,4 +420,15 @@
     """
     It looks like something out of one of the infinite tomes that cover each wall.
     """,
-)
\ No newline at end of file
+)
+
+# Name every prototype, so that saves can refer to one instead of storing a whole entity.
+prototypes: Dict[str, Entity] = {name: value for name, value in list(globals().items()) if isinstance(value, Entity)}
+for prototype_id, prototype in prototypes.items():
+    prototype.prototype_id = prototype_id
+
+# Bodies only store the spec of each part, parts which need an Item get a copy of the prototype with that spec.
+part_prototypes: Dict[int, Item] = {}
+for prototype in prototypes.values():
+    if isinstance(prototype, Item) and prototype.part:
+        part_prototypes.setdefault(prototype.part.spec_id, prototype)
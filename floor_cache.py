@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, Optional
+import collections
+import os
+import shutil
+import tempfile
+import weakref
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+DEFAULT_CAPACITY = 2
+"""How many floors a FloorCache keeps in memory by default."""
+
+
+class FloorCache:
+    """Keeps the maps of the floors the player has left, so that they can be returned to.
+
+    The `capacity` most recently left floors are kept in memory.  Older floors are evicted to compressed
+    snapshots in a temporary directory, so memory use doesn't grow with the depth of a run.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.maps: collections.OrderedDict[int, GameMap] = collections.OrderedDict()  # Least recently left first.
+        self.snapshot_paths: Dict[int, str] = {}
+        self.directory: Optional[str] = None  # Made when the first snapshot is written.
+
+    def __contains__(self, floor: int) -> bool:
+        return floor in self.maps or floor in self.snapshot_paths
+
+    def store(self, floor: int, game_map: GameMap) -> None:
+        """Keep the map of a floor the player is leaving."""
+        self.maps[floor] = game_map
+        self.maps.move_to_end(floor)
+        while len(self.maps) > self.capacity:
+            evicted_floor, evicted_map = self.maps.popitem(last=False)
+            self.write_snapshot(evicted_floor, encode_floor(evicted_map.engine, evicted_map))
+
+    def take(self, floor: int, engine: Engine) -> Optional[GameMap]:
+        """Remove and return the map of a floor the player is returning to, or None if it was never stored."""
+        if floor in self.maps:
+            return self.maps.pop(floor)
+        path = self.snapshot_paths.pop(floor, None)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+        os.remove(path)
+        return decode_floor(engine, data)
+
+    def snapshots(self, engine: Engine) -> Dict[int, bytes]:
+        """Return a compressed snapshot of every stored floor, for saving."""
+        snapshots = {floor: encode_floor(engine, game_map) for floor, game_map in self.maps.items()}
+        for floor, path in self.snapshot_paths.items():
+            with open(path, "rb") as f:
+                snapshots[floor] = f.read()
+        return snapshots
+
+    def restore(self, snapshots: Dict[int, bytes]) -> None:
+        """Store the floors of a loaded save.  They stay on disk until they are returned to."""
+        for floor, data in snapshots.items():
+            self.write_snapshot(floor, data)
+
+    def write_snapshot(self, floor: int, data: bytes) -> None:
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="floors-")
+            weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+        path = os.path.join(self.directory, f"floor-{floor}.xz")
+        with open(path, "wb") as f:
+            f.write(data)
+        self.snapshot_paths[floor] = path
+
+
+def encode_floor(engine: Engine, game_map: GameMap) -> bytes:
+    import serialization
+
+    return serialization.save_floor(engine, game_map)
+
+
+def decode_floor(engine: Engine, data: bytes) -> GameMap:
+    import serialization
+
+    return serialization.load_floor(engine, data)
@@ -1,30 +1,70 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Iterable, Iterator, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import concurrent.futures
+import random
 
 from tcod.console import Console
+from tcod.map import compute_fov
 import numpy as np
 
+from actor_store import ActorStore
 from entity import Actor, Item
+from floor_cache import FloorCache
 import tile_types
 
 if TYPE_CHECKING:
+    from camera import Camera
     from engine import Engine
     from entity import Entity
+    from procgen import DungeonLayout
+
+LAYOUT_STREAM = 1
+"""Seeds floor layouts apart from the rest of the floor, see GameWorld.layout_floor."""
+
+_layout_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def get_layout_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the worker thread which lays out floors ahead of time."""
+    global _layout_executor
+    if _layout_executor is None:
+        _layout_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="layout")
+    return _layout_executor
 
 
 class GameMap:
     def __init__(self, engine: Engine, width: int, height: int, entities: Iterable[Entity] = ()):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        # Ordered, so that turn order and saves don't depend on memory addresses.
+        # Each entity maps to its position in that order.
+        self.entities: Dict[Entity, int] = {}
+        self.next_entity_order = 0
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
 
+        # Spatial index of entities, kept in sync by add_entity, remove_entity and move_entity.
+        self.entities_by_location: Dict[Tuple[int, int], List[Entity]] = {}
+        self.entity_locations: Dict[Entity, Tuple[int, int]] = {}
+        self.blocked = np.full((width, height), fill_value=False, order="F")  # Tiles blocked by an entity
+        self.actor_store = ActorStore()  # The actors as arrays, kept in sync the same way.
+
         self.visible = np.full((width, height), fill_value=False, order="F")  # Tiles the player can currently see
         self.loaded = np.full((width, height), fill_value=False, order="F")  # Tiles that are loaded
         self.explored = np.full((width, height), fill_value=False, order="F")  # Tiles the player has seen before
+        # The area outside of which `visible` and `loaded` are all False, or None if unknown.
+        self.fov_area: Optional[Tuple[slice, slice]] = None
 
         self.downstairs_location = (0, 0)
+        self.upstairs_location: Optional[Tuple[int, int]] = None  # None on the first floor.
+
+        # Render caches of the camera view, rebuilt lazily after invalidate_render_cache or a change to the entities.
+        self.map_layer: Optional[np.ndarray] = None
+        self.entities_sorted_for_rendering: Optional[List[Entity]] = None  # Only the visible entities.
+        self.render_view: Optional[Tuple[int, int, int, int]] = None  # The camera the caches were built for.
+
+        for entity in entities:
+            self.add_entity(entity)
 
     @property
     def gamemap(self) -> GameMap:
@@ -39,52 +79,174 @@ def actors(self) -> Iterator[Actor]:
     def items(self) -> Iterator[Item]:
         yield from (entity for entity in self.entities if isinstance(entity, Item))
 
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map and index it at its current location."""
+        if entity in self.entities:
+            self.remove_entity(entity)
+        location = entity.x, entity.y
+        self.entities[entity] = self.next_entity_order
+        self.next_entity_order += 1
+        self.entities_sorted_for_rendering = None
+        self.entity_locations[entity] = location
+        self.entities_by_location.setdefault(location, []).append(entity)
+        self.update_blocked(*location)
+        if isinstance(entity, Actor):
+            self.actor_store.add(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map and its index."""
+        del self.entities[entity]
+        self.entities_sorted_for_rendering = None
+        location = self.entity_locations.pop(entity)
+        entities_here = self.entities_by_location[location]
+        entities_here.remove(entity)
+        if not entities_here:
+            del self.entities_by_location[location]
+        self.update_blocked(*location)
+        if isinstance(entity, Actor):
+            self.actor_store.remove(entity)
+
+    def move_entity(self, entity: Entity, x: int, y: int) -> None:
+        """Move an entity already on this map to a new location."""
+        location = self.entity_locations[entity]
+        entities_here = self.entities_by_location[location]
+        entities_here.remove(entity)
+        if not entities_here:
+            del self.entities_by_location[location]
+        self.update_blocked(*location)
+
+        entity.x, entity.y = x, y
+        self.entity_locations[entity] = x, y
+        self.entities_by_location.setdefault((x, y), []).append(entity)
+        self.update_blocked(x, y)
+        if isinstance(entity, Actor):
+            self.actor_store.move(entity)
+        self.entities_sorted_for_rendering = None
+
+    def invalidate_render_cache(self) -> None:
+        """Rebuild the render caches on the next render.  Call after changing `tiles`, `visible` or `explored`."""
+        self.map_layer = None
+        self.entities_sorted_for_rendering = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the render caches out of saves."""
+        state = self.__dict__.copy()
+        state["map_layer"] = None
+        state["entities_sorted_for_rendering"] = None
+        return state
+
+    def update_blocked(self, x: int, y: int) -> None:
+        """Recompute the `blocked` mask at this location."""
+        self.blocked[x, y] = any(
+            entity.blocks_movement for entity in self.entities_by_location.get((x, y), ())
+        )
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        """Return every entity at this location."""
+        return list(self.entities_by_location.get((x, y), ()))
+
     def get_blocking_entity_at_location(
         self,
         location_x: int,
         location_y: int,
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if entity.blocks_movement and entity.x == location_x and entity.y == location_y:
+        if not self.blocked[location_x, location_y]:
+            return None
+
+        for entity in self.entities_by_location.get((location_x, location_y), ()):
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.entities_by_location.get((x, y), ()):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
+    def get_items_at_location(self, x: int, y: int) -> List[Item]:
+        return [entity for entity in self.entities_by_location.get((x, y), ()) if isinstance(entity, Item)]
+
+    def actors_in_radius(self, x: int, y: int, radius: int, *, line_of_sight: bool = False) -> List[Actor]:
+        """Return the living actors within `radius` of a position, in map order.
+
+        If `line_of_sight` is True then actors hidden from the position by walls are left out.
+        """
+        store = self.actor_store
+        rows = np.nonzero(store.alive & (store.distances_squared(x, y) <= radius**2))[0]
+        if line_of_sight and len(rows):
+            area = (slice(max(0, x - radius), x + radius + 1), slice(max(0, y - radius), y + radius + 1))
+            seen = compute_fov(
+                self.tiles["transparent"][area], (x - area[0].start, y - area[1].start), radius=radius
+            )
+            rows = rows[seen[store.x[rows] - area[0].start, store.y[rows] - area[1].start]]
+        return sorted(store.handles[rows].tolist(), key=self.entities.__getitem__)
+
+    def nearest_actor(
+        self, x: int, y: int, maximum_range: int, mask: np.ndarray, exclude: Optional[Actor] = None
+    ) -> Optional[Actor]:
+        """Return the closest living actor within `maximum_range` of a position which is on a True tile of `mask`.
+
+        Ties go to the actor first in map order.  `exclude` is never returned.
+        """
+        store = self.actor_store
+        candidates = store.alive & mask[store.x, store.y]
+        if exclude is not None and exclude in store:
+            candidates[store.rows[exclude]] = False
+        distances_squared = store.distances_squared(x, y)
+        rows = np.nonzero(candidates & (distances_squared < (maximum_range + 1) ** 2))[0]
+        if not len(rows):
+            return None
+        rows = rows[np.argsort([self.entities[actor] for actor in store.handles[rows].tolist()], kind="stable")]
+        nearest: Actor = store.handles[rows[np.argmin(distances_squared[rows])]]
+        return nearest
+
     def in_bounds(self, x: int, y: int) -> bool:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
-    def render(self, console: Console) -> None:
+    def render(self, console: Console, camera: Camera) -> None:
         """
-        Renders the map.
+        Renders the part of the map inside of the camera view to the top left of the console.
 
         If a tile is in the "visible" array, then draw it with the "light" colors.
         If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
         Otherwise, the default is "SHROUD".
         """
-        console.rgb[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD,
-        )
+        view = camera.view(self.width, self.height)
+        render_view = (camera.x, camera.y, camera.width, camera.height)
+        if render_view != self.render_view:
+            self.render_view = render_view
+            self.invalidate_render_cache()
 
-        entities_sorted_for_rendering = sorted(self.entities, key=lambda x: x.render_order.value)
+        if self.map_layer is None:
+            self.map_layer = np.select(
+                condlist=[self.visible[view], self.explored[view]],
+                choicelist=[self.tiles["light"][view], self.tiles["dark"][view]],
+                default=tile_types.SHROUD,
+            )
+        console.rgb[0 : self.map_layer.shape[0], 0 : self.map_layer.shape[1]] = self.map_layer
+
+        if self.entities_sorted_for_rendering is None:
+            # Only look up entities on the visible tiles of the view, however many there are on the map.
+            visible_x, visible_y = np.nonzero(self.visible[view])
+            visible_entities = [
+                entity
+                for x, y in zip((visible_x + camera.x).tolist(), (visible_y + camera.y).tolist())
+                for entity in self.entities_by_location.get((x, y), ())
+            ]
+            self.entities_sorted_for_rendering = sorted(visible_entities, key=lambda x: x.render_order.value)
 
-        for entity in entities_sorted_for_rendering:
-            if self.visible[entity.x, entity.y]:
-                console.print(x=entity.x, y=entity.y, string=entity.char, fg=entity.color)
+        for entity in self.entities_sorted_for_rendering:
+            console.print(*camera.map_to_screen(entity.x, entity.y), string=entity.char, fg=entity.color)
 
 
 class GameWorld:
     """
-    Holds the settings for the GameMap, and generates new maps when moving down the stairs.
+    Holds the settings for the GameMap, generates new maps when moving down the stairs, and keeps the maps of
+    floors the player has left.
     """
 
     def __init__(
@@ -97,9 +259,16 @@ def __init__(
         room_min_size: int,
         room_max_size: int,
         current_floor: int = 0,
+        seed: Optional[int] = None,
+        pregenerate: bool = True,
     ):
         self.engine = engine
 
+        # Every random choice in the game world is drawn from these, see seed_floor.
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.np_rng = np.random.default_rng(self.seed)
+
         self.map_width = map_width
         self.map_height = map_height
 
@@ -110,31 +279,111 @@ def __init__(
 
         self.current_floor = current_floor
 
-    def generate_floor(self) -> None:
-        from procgen import generate_box_dungeon, generate_bsp_dungeon, generate_cave_dungeon
+        self.pregenerate = pregenerate  # Lay out the next floor in the background.
+        self.pending_layout: Optional[Tuple[int, concurrent.futures.Future[DungeonLayout]]] = None
 
-        self.current_floor += 1
+        self.floor_cache = FloorCache()
 
-        if (0 < self.current_floor and self.current_floor < 4) or (14 < self.current_floor and self.current_floor < 18): 
-            self.engine.game_map = generate_bsp_dungeon(
-            room_min_size=self.room_min_size,
-            room_max_ratio=1.5, # make a variable
-            map_width=self.map_width,
-            map_height=self.map_height,
-            engine=self.engine,
-        )
-        elif (3 < self.current_floor and self.current_floor < 7) or (11 < self.current_floor and self.current_floor < 15):
-            self.engine.game_map = generate_cave_dungeon(
+    def __getstate__(self) -> Dict[str, Any]:
+        """Leave the pending layout and the floor cache out of saves.
+
+        The layout is made again if needed, and serialization saves the cached floors on their own.
+        """
+        state = self.__dict__.copy()
+        state["pending_layout"] = None
+        state["floor_cache"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    def seed_floor(self) -> None:
+        """Reseed the random generators from the world seed and the current floor.
+
+        This makes every floor replayable on its own from the same seed.
+        """
+        seed_sequence = np.random.SeedSequence([self.seed, self.current_floor])
+        self.np_rng = np.random.default_rng(seed_sequence)
+        self.rng.seed(int(seed_sequence.generate_state(1)[0]))
+
+    def layout_floor(self, floor: int) -> DungeonLayout:
+        """Return the tile layout of `floor`.
+
+        Layouts are drawn from their own random generators, seeded from the world seed and the floor alone, so
+        this can run in another thread while the game goes on.
+        """
+        from procgen import layout_box_dungeon, layout_bsp_dungeon, layout_cave_dungeon
+
+        seed_sequence = np.random.SeedSequence([self.seed, floor, LAYOUT_STREAM])
+        rng = random.Random(int(seed_sequence.generate_state(1)[0]))
+
+        if (0 < floor and floor < 4) or (14 < floor and floor < 18):
+            return layout_bsp_dungeon(
+                room_min_size=self.room_min_size,
+                room_max_ratio=1.5, # make a variable
                 map_width=self.map_width,
                 map_height=self.map_height,
-                engine=self.engine,
+                rng=rng,
+            )
+        elif (3 < floor and floor < 7) or (11 < floor and floor < 15):
+            return layout_cave_dungeon(
+                map_width=self.map_width,
+                map_height=self.map_height,
+                np_rng=np.random.default_rng(seed_sequence),
             )
         else:
-            self.engine.game_map = generate_box_dungeon(
+            return layout_box_dungeon(
                 max_rooms=self.max_rooms,
                 room_min_size=self.room_min_size,
                 room_max_size=self.room_max_size,
                 map_width=self.map_width,
                 map_height=self.map_height,
-                engine=self.engine,
+                rng=rng,
             )
+
+    def pregenerate_floor(self, floor: int) -> None:
+        """Start laying out `floor` in the background, for generate_floor to pick up."""
+        self.pending_layout = floor, get_layout_executor().submit(self.layout_floor, floor)
+
+    def take_layout(self, floor: int) -> DungeonLayout:
+        """Return the layout of `floor`, from the background if it was pregenerated."""
+        pending_layout, self.pending_layout = self.pending_layout, None
+        if pending_layout is not None and pending_layout[0] == floor:
+            return pending_layout[1].result()  # Only waits if the player got here before it was done.
+        return self.layout_floor(floor)
+
+    def generate_floor(self) -> None:
+        """Move to a new map for the next floor, and start laying out the one after it."""
+        from procgen import populate_dungeon
+
+        self.current_floor += 1
+        self.seed_floor()
+        self.engine.game_map = populate_dungeon(self.take_layout(self.current_floor), self.engine)
+        if self.pregenerate:
+            self.pregenerate_floor(self.current_floor + 1)
+
+    def descend(self) -> None:
+        """Move the player down to the next floor, generating it on the first visit."""
+        self.floor_cache.store(self.current_floor, self.engine.game_map)
+        game_map = self.floor_cache.take(self.current_floor + 1, self.engine)
+        if game_map is None:
+            self.generate_floor()
+            return
+
+        self.current_floor += 1
+        assert game_map.upstairs_location is not None
+        self.enter_floor(game_map, game_map.upstairs_location)
+        if self.pregenerate and self.current_floor + 1 not in self.floor_cache:
+            self.pregenerate_floor(self.current_floor + 1)
+
+    def ascend(self) -> None:
+        """Move the player back up to the previous floor."""
+        self.floor_cache.store(self.current_floor, self.engine.game_map)
+        game_map = self.floor_cache.take(self.current_floor - 1, self.engine)
+        assert game_map is not None, "Every floor above the current one was stored when it was left."
+        self.current_floor -= 1
+        self.enter_floor(game_map, game_map.downstairs_location)
+
+    def enter_floor(self, game_map: GameMap, location: Tuple[int, int]) -> None:
+        self.engine.game_map = game_map
+        self.engine.player.place(*location, game_map)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Callable, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, Union
 import os
+import time
 
 import tcod
 
@@ -11,6 +12,8 @@
 import exceptions
 from forms import Form
 from part_types import PartType
+import profiler
+import travel
 
 if TYPE_CHECKING:
     from engine import Engine
@@ -53,6 +56,23 @@
     tcod.event.K_CLEAR,
 }
 
+DIGIT_KEYS = {
+    tcod.event.K_0: 0,
+    tcod.event.K_1: 1,
+    tcod.event.K_2: 2,
+    tcod.event.K_3: 3,
+    tcod.event.K_4: 4,
+    tcod.event.K_5: 5,
+    tcod.event.K_6: 6,
+    tcod.event.K_7: 7,
+    tcod.event.K_8: 8,
+    tcod.event.K_9: 9,
+}
+MAX_REPEAT_COUNT = 999
+
+REST_TURNS = 100
+"""The most turns a single rest command waits."""
+
 CONFIRM_KEYS = {
     tcod.event.K_RETURN,
     tcod.event.K_KP_ENTER,
@@ -68,6 +88,16 @@
 
 
 class BaseEventHandler(tcod.event.EventDispatch[ActionOrHandler]):
+    busy = False
+    """True while this handler has work to do without waiting for events, see `advance`."""
+
+    def advance(self, deadline: Optional[float] = None) -> BaseEventHandler:
+        """Work until `deadline`, a `time.perf_counter` value, or until done if it is None.
+
+        Returns the next active event handler.
+        """
+        return self
+
     def handle_events(self, event: tcod.event.Event) -> BaseEventHandler:
         """Handle an event and return the next active event handler."""
         state = self.dispatch(event)
@@ -138,19 +168,24 @@ def handle_action(self, action: Optional[Action]) -> bool:
             return False
 
         try:
-            action.perform()
+            with profiler.phase("action", action):
+                action.perform()
         except exceptions.Impossible as exc:
             self.engine.message_log.add_message(exc.args[0], color.impossible)
             return False  # Skip enemy turn on exceptions.
 
-        self.engine.handle_enemy_turns()
+        with profiler.phase("enemy turns"):
+            self.engine.handle_enemy_turns()
 
-        self.engine.update_fov()
+        with profiler.phase("fov"):
+            self.engine.update_fov()
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
-        if self.engine.game_map.in_bounds(event.tile.x, event.tile.y):
-            self.engine.mouse_location = event.tile.x, event.tile.y
+        camera = self.engine.camera
+        x, y = camera.screen_to_map(event.tile.x, event.tile.y)
+        if self.engine.game_map.in_bounds(x, y) and camera.in_view(x, y):
+            self.engine.mouse_location = x, y
 
     def on_render(self, console: tcod.Console) -> None:
         self.engine.render(console)
@@ -560,7 +595,7 @@ def __init__(self, engine: Engine):
     def on_render(self, console: tcod.Console) -> None:
         """Highlight the tile under the cursor."""
         super().on_render(console)
-        x, y = self.engine.mouse_location
+        x, y = self.engine.camera.map_to_screen(*self.engine.mouse_location)
         console.tiles_rgb["bg"][x, y] = color.white
         console.tiles_rgb["fg"][x, y] = color.black
 
@@ -580,9 +615,10 @@ def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
             dx, dy = MOVE_KEYS[key]
             x += dx * modifier
             y += dy * modifier
-            # Clamp the cursor index to the map size.
-            x = max(0, min(x, self.engine.game_map.width - 1))
-            y = max(0, min(y, self.engine.game_map.height - 1))
+            # Clamp the cursor index to the part of the map on screen.
+            view_x, view_y = self.engine.camera.view(self.engine.game_map.width, self.engine.game_map.height)
+            x = max(view_x.start, min(x, view_x.stop - 1))
+            y = max(view_y.start, min(y, view_y.stop - 1))
             self.engine.mouse_location = x, y
             return None
         elif key in CONFIRM_KEYS:
@@ -591,9 +627,10 @@ def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
 
     def ev_mousebuttondown(self, event: tcod.event.MouseButtonDown) -> Optional[ActionOrHandler]:
         """Left click confirms a selection."""
-        if self.engine.game_map.in_bounds(*event.tile):
+        x, y = self.engine.camera.screen_to_map(*event.tile)
+        if self.engine.game_map.in_bounds(x, y) and self.engine.camera.in_view(x, y):
             if event.button == 1:
-                return self.on_index_selected(*event.tile)
+                return self.on_index_selected(x, y)
         return super().ev_mousebuttondown(event)
 
     def on_index_selected(self, x: int, y: int) -> Optional[ActionOrHandler]:
@@ -606,9 +643,8 @@ class LookHandler(SelectIndexHandler):
 
     def on_index_selected(self, x: int, y: int) -> MainGameEventHandler:
         """Return to main handler."""
-        for item in self.engine.game_map.items:
-            if x == item.x and y == item.y:
-                return PopupMessage(self, item.description)
+        for item in self.engine.game_map.get_items_at_location(x, y):
+            return PopupMessage(self, item.description)
         if self.engine.game_map.get_actor_at_location(x,y):
             return PopupMessage(self, self.engine.game_map.get_actor_at_location(x,y).description)
         return MainGameEventHandler(self.engine)
@@ -644,7 +680,7 @@ def on_render(self, console: tcod.Console) -> None:
         """Highlight the tile under the cursor."""
         super().on_render(console)
 
-        x, y = self.engine.mouse_location
+        x, y = self.engine.camera.map_to_screen(*self.engine.mouse_location)
 
         # Draw a rectangle around the targeted area, so the player can see the affected tiles.
         console.draw_frame(
@@ -804,6 +840,8 @@ def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
 
         if key == tcod.event.K_PERIOD and modifier & (tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT):
             return actions.TakeStairsAction(player)
+        if key == tcod.event.K_COMMA and modifier & (tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT):
+            return actions.TakeUpStairsAction(player)
 
         if key in MOVE_KEYS:
             dx, dy = MOVE_KEYS[key]
@@ -827,13 +865,184 @@ def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
             return CharacterScreenEventHandler(self.engine)
         elif key == tcod.event.K_SLASH:
             return LookHandler(self.engine)
+        elif key == tcod.event.K_r and modifier & (tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT):
+            return RestHandler(self.engine)
         elif key == tcod.event.K_r:
             return RitualHandler(self.engine)
+        elif key in DIGIT_KEYS and DIGIT_KEYS[key]:
+            return RepeatCountHandler(self.engine, DIGIT_KEYS[key])
+        elif key == tcod.event.K_x:
+            if modifier & (tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT):
+                if not self.engine.game_map.explored[self.engine.game_map.downstairs_location]:
+                    self.engine.message_log.add_message("You don't know where the stairs are.", color.impossible)
+                    return None
+                return TravelHandler(self.engine, self.engine.game_map.downstairs_location)
+            return TravelHandler(self.engine)
+        elif key == tcod.event.K_F12 and profiler.active:
+            profiler.active.dump()
+            self.engine.message_log.add_message(f"Profile written to {profiler.active.filename}.")
 
         # No valid key was pressed
         return action
 
 
+class RepeatedActionHandler(EventHandler):
+    """Performs actions one after another in `advance`, without waiting for a key press between them.
+
+    Stops when `next_action` returns None, an action is impossible, a hostile comes into view, the player is
+    hurt or a key is pressed.  Doesn't start while a hostile is in view.
+    """
+
+    busy = True
+
+    def __init__(self, engine: Engine):
+        super().__init__(engine)
+        self.steps = 0  # Actions performed so far.
+        self.hp = engine.player.fighter.hp
+
+    def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
+        """Any key stops."""
+        return MainGameEventHandler(self.engine)
+
+    def ev_mousebuttondown(self, event: tcod.event.MouseButtonDown) -> Optional[ActionOrHandler]:
+        return MainGameEventHandler(self.engine)
+
+    def advance(self, deadline: Optional[float] = None) -> BaseEventHandler:
+        player = self.engine.player
+        while True:
+            reason = self.interruption()
+            if reason:
+                self.engine.message_log.add_message(reason, color.impossible if not self.steps else color.white)
+                return MainGameEventHandler(self.engine)
+
+            action = self.next_action()
+            if action is None:
+                self.on_done()
+                return MainGameEventHandler(self.engine)
+
+            if not self.handle_action(action):
+                return MainGameEventHandler(self.engine)
+            self.steps += 1
+            if not player.is_alive:
+                return GameOverEventHandler(self.engine)
+            if player.level.requires_level_up:
+                return LevelUpEventHandler(self.engine)
+            if deadline is not None and time.perf_counter() >= deadline:
+                return self
+
+    def interruption(self) -> Optional[str]:
+        """Return why the player should stop, or None to keep going."""
+        player = self.engine.player
+        hostiles = travel.visible_hostiles(self.engine.game_map, player)
+        if hostiles:
+            if not self.steps:
+                return "Not with enemies in view."
+            return f"You see the {hostiles[0].name}."
+        if player.fighter.hp < self.hp:
+            return "You are hurt."
+        self.hp = player.fighter.hp  # Healing while repeating doesn't count against getting hurt later.
+        return None
+
+    def next_action(self) -> Optional[Action]:
+        """Return the next action to perform, or None when done."""
+        raise NotImplementedError()
+
+    def on_done(self) -> None:
+        """Called when `next_action` ran out of actions."""
+
+
+class TravelHandler(RepeatedActionHandler):
+    """Walk the player to `destination`, or explore the nearest unexplored tiles if it is None."""
+
+    def __init__(self, engine: Engine, destination: Optional[Tuple[int, int]] = None):
+        super().__init__(engine)
+        self.destination = destination
+        self.path: List[Tuple[int, int]] = []
+
+    def next_action(self) -> Optional[Action]:
+        step = self.next_step()
+        if step is None:
+            return None
+        player = self.engine.player
+        return actions.MovementAction(player, step[0] - player.x, step[1] - player.y)
+
+    def on_done(self) -> None:
+        player = self.engine.player
+        if self.destination is None:
+            self.engine.message_log.add_message("There is nothing left to explore here.", color.impossible)
+        elif (player.x, player.y) != self.destination:
+            self.engine.message_log.add_message("You can't find a way there.", color.impossible)
+
+    def next_step(self) -> Optional[Tuple[int, int]]:
+        """Return the next location to step to, planning a new path when the old one is used up or obsolete."""
+        game_map = self.engine.game_map
+        player = self.engine.player
+        # When exploring the path leads to an unexplored tile, so it is obsolete once that tile comes into view.
+        stale = not self.path or (self.destination is None and game_map.explored[self.path[-1]])
+        if stale or game_map.blocked[self.path[0]]:
+            if self.destination is None:
+                self.path = travel.path_to_frontier(game_map, (player.x, player.y))
+            elif (player.x, player.y) != self.destination:
+                self.path = travel.path_to(game_map, (player.x, player.y), self.destination)
+        return self.path.pop(0) if self.path else None
+
+
+class RepeatHandler(RepeatedActionHandler):
+    """Perform the action made by `make_action` up to `count` times."""
+
+    def __init__(self, engine: Engine, make_action: Callable[[], Action], count: int):
+        super().__init__(engine)
+        self.make_action = make_action
+        self.count = count
+
+    def next_action(self) -> Optional[Action]:
+        return self.make_action() if self.steps < self.count else None
+
+
+class RestHandler(RepeatedActionHandler):
+    """Wait until the player is fully healed, for at most REST_TURNS turns."""
+
+    def next_action(self) -> Optional[Action]:
+        fighter = self.engine.player.fighter
+        if fighter.hp >= fighter.max_hp or self.steps >= REST_TURNS:
+            return None
+        return WaitAction(self.engine.player)
+
+    def on_done(self) -> None:
+        if not self.steps:
+            self.engine.message_log.add_message("You are already fully healed.", color.impossible)
+        else:
+            self.engine.message_log.add_message(f"You rest for {self.steps} turns.")
+
+
+class RepeatCountHandler(EventHandler):
+    """Reads the digits of a repeat count, then repeats the move or wait which follows them."""
+
+    def __init__(self, engine: Engine, count: int):
+        super().__init__(engine)
+        self.count = count
+
+    def on_render(self, console: tcod.Console) -> None:
+        super().on_render(console)
+        console.print(0, 0, f"Repeat {self.count} times: move or wait", fg=color.white, bg=color.black)
+
+    def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
+        key = event.sym
+        player = self.engine.player
+        if key in DIGIT_KEYS:
+            self.count = min(MAX_REPEAT_COUNT, self.count * 10 + DIGIT_KEYS[key])
+            return None
+        if key == tcod.event.K_BACKSPACE:
+            self.count //= 10
+            return self if self.count else MainGameEventHandler(self.engine)
+        if key in MOVE_KEYS:
+            dx, dy = MOVE_KEYS[key]
+            return RepeatHandler(self.engine, lambda: actions.MovementAction(player, dx, dy), self.count)
+        if key in WAIT_KEYS:
+            return RepeatHandler(self.engine, lambda: WaitAction(player), self.count)
+        return MainGameEventHandler(self.engine)
+
+
 class GameOverEventHandler(EventHandler):
     def on_quit(self) -> None:
         """Handle exiting out of a finished game."""
@@ -875,13 +1084,13 @@ def on_render(self, console: tcod.Console) -> None:
         log_console.print_box(0, 0, log_console.width, 1, "┤Message history├", alignment=tcod.CENTER)
 
         # Render the message log using the cursor parameter.
-        self.engine.message_log.render_messages(
+        self.engine.message_log.render(
             log_console,
             1,
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            last=self.cursor,
         )
         log_console.blit(console, 3, 3)
 
@@ -1,4 +1,6 @@
 #!/usr/bin/env python3
+from typing import Optional, Tuple
+import time
 import traceback
 
 import tcod
@@ -6,8 +8,12 @@
 import color
 import exceptions
 import input_handlers
+import profiler
 import setup_game
 
+BUSY_FRAME_TIME = 1 / 30
+"""Seconds a busy handler works between frames, so that long commands are drawn at a throttled rate."""
+
 
 def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
     """If the current event handler has an active Engine then save it."""
@@ -15,13 +21,23 @@ def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
         handler.engine.save_as(filename)
         print("Game saved.")
 
+
+def render_state(handler: input_handlers.BaseEventHandler) -> Tuple[int, Optional[Tuple[int, int]]]:
+    """Return the state which decides if the screen must be redrawn after mouse motion."""
+    if isinstance(handler, input_handlers.EventHandler):
+        return id(handler), handler.engine.mouse_location
+    return id(handler), None
+
+def load_tileset() -> tcod.tileset.Tileset:
+    return tcod.tileset.load_tilesheet("data/dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD)
+
 # build with -> pyinstaller main.py -F -i icon.ico -w
 
 def main() -> None:
     screen_width = 80
     screen_height = 50
 
-    tileset = tcod.tileset.load_tilesheet("data/dejavu10x10_gs_tc.png", 32, 8, tcod.tileset.CHARMAP_TCOD)
+    tileset = load_tileset()
 
     handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
 
@@ -33,17 +49,31 @@ def main() -> None:
         vsync=True,
     ) as context:
         root_console = tcod.Console(screen_width, screen_height, order="F")
+        needs_redraw = True
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                if needs_redraw:
+                    root_console.clear()
+                    with profiler.phase("render"):
+                        handler.on_render(console=root_console)
+                    context.present(root_console)
 
                 try:
-                    for event in tcod.event.wait():
+                    previous_state = render_state(handler)
+                    needs_redraw = False
+                    # Busy handlers only check for events, so that a key press can interrupt them.
+                    for event in tcod.event.get() if handler.busy else tcod.event.wait():
                         context.convert_event(event)
                         handler = handler.handle_events(event)
+                        if not isinstance(event, tcod.event.MouseMotion):
+                            needs_redraw = True
+                    if handler.busy:
+                        handler = handler.advance(time.perf_counter() + BUSY_FRAME_TIME)
+                        needs_redraw = True
+                    # Mouse motion only matters when it changes the hovered tile.
+                    needs_redraw = needs_redraw or render_state(handler) != previous_state
                 except Exception:  # Handle exceptions in game.
+                    needs_redraw = True
                     traceback.print_exc()  # Print error to stderr.
                     # Then print the error to the message log.
                     if isinstance(handler, input_handlers.EventHandler):
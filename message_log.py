@@ -1,16 +1,32 @@
-from typing import Iterable, List, Reversible, Tuple
+from typing import Deque, Dict, Iterable, List, Optional, Reversible, Tuple
+import collections
+import itertools
+import json
 import textwrap
 
 import tcod
 
 import color
 
+DEFAULT_CAPACITY = 1000
+"""How many messages a MessageLog keeps by default."""
+
 
 class Message:
     def __init__(self, text: str, fg: Tuple[int, int, int]):
         self.plain_text = text
         self.fg = fg
-        self.count = 1
+        self._count = 1
+        self.wrapped_lines: Dict[int, List[str]] = {}  # full_text wrapped to each width it was rendered at.
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @count.setter
+    def count(self, value: int) -> None:
+        self._count = value
+        self.wrapped_lines.clear()  # The full text changed.
 
     @property
     def full_text(self) -> str:
@@ -19,10 +35,24 @@ def full_text(self) -> str:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def wrap(self, width: int) -> List[str]:
+        """Return the full text wrapped to `width`, only wrapping it again after the count changes."""
+        lines = self.wrapped_lines.get(width)
+        if lines is None:
+            lines = self.wrapped_lines[width] = list(MessageLog.wrap(self.full_text, width))
+        return lines
+
 
 class MessageLog:
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    """The most recent messages, up to `capacity`.
+
+    If `spill_path` is given then messages pushed out of the log are appended to that file as JSON lines of
+    `[text, fg, count]`.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, spill_path: Optional[str] = None) -> None:
+        self.messages: Deque[Message] = collections.deque(maxlen=capacity)
+        self.spill_path = spill_path
 
     def add_message(self, text: str, fg: Tuple[int, int, int] = color.white, *, stack: bool = True) -> None:
         """Add a message to this log.
@@ -34,16 +64,31 @@ def add_message(self, text: str, fg: Tuple[int, int, int] = color.white, *, stac
         """
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
-        else:
-            self.messages.append(Message(text, fg))
-
-    def render(self, console: tcod.Console, x: int, y: int, width: int, height: int) -> None:
+            return
+        if self.spill_path and len(self.messages) == self.messages.maxlen:
+            self.spill(self.messages[0])
+        self.messages.append(Message(text, fg))
+
+    def spill(self, message: Message) -> None:
+        """Append a message which is about to be pushed out of the log to `spill_path`."""
+        assert self.spill_path
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps([message.plain_text, message.fg, message.count]) + "\n")
+
+    def render(
+        self, console: tcod.Console, x: int, y: int, width: int, height: int, last: Optional[int] = None
+    ) -> None:
         """Render this log over the given area.
 
         `x`, `y`, `width`, `height` is the rectangular region to render onto
         the `console`.
+
+        If `last` is given then only the messages up to that index are rendered, for scrolling back.
         """
-        self.render_messages(console, x, y, width, height, self.messages)
+        newest_first: Iterable[Message] = reversed(self.messages)
+        if last is not None:
+            newest_first = itertools.islice(newest_first, len(self.messages) - 1 - last, None)
+        self.render_lines(console, x, y, width, height, newest_first)
 
     @staticmethod
     def wrap(string: str, width: int) -> Iterable[str]:
@@ -64,10 +109,17 @@ def render_messages(
         The `messages` are rendered starting at the last message and working
         backwards.
         """
+        cls.render_lines(console, x, y, width, height, reversed(messages))
+
+    @staticmethod
+    def render_lines(
+        console: tcod.Console, x: int, y: int, width: int, height: int, newest_first: Iterable[Message]
+    ) -> None:
+        """Render messages from the bottom up until the area is full."""
         y_offset = height - 1
 
-        for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text, width))):
+        for message in newest_first:
+            for line in reversed(message.wrap(width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+from typing import TYPE_CHECKING, Dict, Iterator, List, NamedTuple, Tuple
+import bisect
 import random
 
-import tcod
-import copy
 import numpy as np
+import tcod
 
 from game_map import GameMap
 import entity_factories
@@ -35,15 +35,10 @@
 }
 
 enemy_chances: Dict[int, List[Tuple[Entity, int]]] = {
-    0: [(entity_factories.orc, 50)],
-    0: [(entity_factories.dwarf, 15)],
-    0: [(entity_factories.librarian, 80)],
-    2: [(entity_factories.mad_librarian, 40)],
-    2: [(entity_factories.librarian, 40)],
-    3: [(entity_factories.dwarf, 0)],
-    1: [(entity_factories.mad_dwarf, 15)],
-    1: [(entity_factories.max, 3)],
-    3: [(entity_factories.troll, 15)],
+    0: [(entity_factories.orc, 50), (entity_factories.dwarf, 15), (entity_factories.librarian, 80)],
+    1: [(entity_factories.mad_dwarf, 15), (entity_factories.max, 3)],
+    2: [(entity_factories.mad_librarian, 40), (entity_factories.librarian, 40)],
+    3: [(entity_factories.dwarf, 0), (entity_factories.troll, 15)],
     5: [(entity_factories.troll, 30)],
     7: [(entity_factories.troll, 60)],
 }
@@ -61,29 +56,43 @@ def get_max_value_for_floor(max_value_by_floor: List[Tuple[int, int]], floor: in
     return current_value
 
 
-def get_entities_at_random(
-    weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
-    number_of_entities: int,
-    floor: int,
-) -> List[Entity]:
-    entity_weighted_chances = {}
+class SpawnTable:
+    """The weighted chances of one floor, compiled into cumulative weights for sampling many entities at once."""
 
-    for key, values in weighted_chances_by_floor.items():
-        if key > floor:
-            break
-        else:
-            for value in values:
-                entity = value[0]
-                weighted_chance = value[1]
+    def __init__(self, entity_weighted_chances: Dict[Entity, int]):
+        self.entities = [entity for entity, weight in entity_weighted_chances.items() if weight > 0]
+        self.cumulative_weights = np.cumsum([entity_weighted_chances[entity] for entity in self.entities])
+
+    def sample(self, number_of_entities: int, np_rng: np.random.Generator) -> List[Entity]:
+        """Return `number_of_entities` entities chosen at random by weight."""
+        if number_of_entities <= 0 or not self.entities:
+            return []
+        targets = np_rng.random(number_of_entities) * self.cumulative_weights[-1]
+        indexes = np.searchsorted(self.cumulative_weights, targets, side="right")
+        return [self.entities[i] for i in indexes.tolist()]
 
-                entity_weighted_chances[entity] = weighted_chance
 
-    entities = list(entity_weighted_chances.keys())
-    entity_weighted_chance_values = list(entity_weighted_chances.values())
+class SpawnTables:
+    """A SpawnTable for every floor of a chances table, each compiled once.
 
-    chosen_entities = random.choices(entities, weights=entity_weighted_chance_values, k=number_of_entities)
+    Weights declared at a floor apply from that floor on, replacing earlier weights of the same entity.
+    """
 
-    return chosen_entities
+    def __init__(self, weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]]):
+        self.floors = sorted(weighted_chances_by_floor)
+        self.tables: List[SpawnTable] = []
+        entity_weighted_chances: Dict[Entity, int] = {}
+        for floor in self.floors:
+            entity_weighted_chances.update(weighted_chances_by_floor[floor])
+            self.tables.append(SpawnTable(entity_weighted_chances))
+
+    def for_floor(self, floor: int) -> SpawnTable:
+        index = bisect.bisect_right(self.floors, floor) - 1
+        return self.tables[index] if index >= 0 else SpawnTable({})
+
+
+enemy_spawn_tables = SpawnTables(enemy_chances)
+item_spawn_tables = SpawnTables(item_chances)
 
 
 class RectangularRoom:
@@ -111,25 +120,29 @@ def intersects(self, other: RectangularRoom) -> bool:
 
 
 def place_entities(room: RectangularRoom, dungeon: GameMap, floor_number: int) -> None:
-    number_of_monsters = random.randint(0, get_max_value_for_floor(max_monsters_by_floor, floor_number))
-    number_of_items = random.randint(0, get_max_value_for_floor(max_items_by_floor, floor_number))
+    rng = dungeon.engine.game_world.rng
+    np_rng = dungeon.engine.game_world.np_rng
+    number_of_monsters = rng.randint(0, get_max_value_for_floor(max_monsters_by_floor, floor_number))
+    number_of_items = rng.randint(0, get_max_value_for_floor(max_items_by_floor, floor_number))
 
-    monsters: List[Entity] = get_entities_at_random(enemy_chances, number_of_monsters, floor_number)
-    items: List[Entity] = get_entities_at_random(item_chances, number_of_items, floor_number)
+    monsters = enemy_spawn_tables.for_floor(floor_number).sample(number_of_monsters, np_rng)
+    items = item_spawn_tables.for_floor(floor_number).sample(number_of_items, np_rng)
 
     for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
 
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
+        if not dungeon.get_entities_at_location(x, y):
             entity.spawn(dungeon, x, y)
 
 
-def tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+def tunnel_between(
+    start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
+) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points."""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5:  # 50% chance.
+    if rng.random() < 0.5:  # 50% chance.
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -143,27 +156,39 @@ def tunnel_between(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tup
         yield x, y
 
 
-def generate_box_dungeon(max_rooms: int,
+class DungeonLayout(NamedTuple):
+    """The tiles of a floor, made before anything is placed on it.
+
+    Layouts don't depend on the engine, so that they can be made ahead of time in another thread.
+    """
+
+    tiles: np.ndarray
+    player_start: Tuple[int, int]
+    downstairs_location: Tuple[int, int]
+    rooms: List[RectangularRoom]  # Entities are placed per room, or scattered over the floor if this is empty.
+
+
+def layout_box_dungeon(
+    max_rooms: int,
     room_min_size: int,
     room_max_size: int,
     map_width: int,
     map_height: int,
-    engine: Engine,
-) -> GameMap:
-    """Generate a new dungeon map."""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    rng: random.Random,
+) -> DungeonLayout:
+    """Lay out rooms at random places, each connected to the previous one."""
+    tiles = np.full((map_width, map_height), fill_value=tile_types.wall, order="F")
 
     rooms: List[RectangularRoom] = []
 
     center_of_last_room = (0, 0)
 
     for _ in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, map_width - room_width - 1)
+        y = rng.randint(0, map_height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
@@ -174,157 +199,183 @@ def generate_box_dungeon(max_rooms: int,
         # If there are no intersections then the room is valid.
 
         # Dig out this rooms inner area.
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        tiles[new_room.inner] = tile_types.floor
 
-        if len(rooms) == 0:
-            # The first room, where the player starts.
-            player.place(*new_room.center, dungeon)
-        else:  # All rooms after the first.
+        if rooms:  # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            for x, y in tunnel_between(rooms[-1].center, new_room.center, rng):
+                tiles[x, y] = tile_types.floor
 
             center_of_last_room = new_room.center
 
-        place_entities(new_room, dungeon, engine.game_world.current_floor)
-
-        dungeon.tiles[center_of_last_room] = tile_types.down_stairs
-        dungeon.downstairs_location = center_of_last_room
+        tiles[center_of_last_room] = tile_types.down_stairs
 
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
-    return dungeon
+    # The player starts in the first room.
+    return DungeonLayout(tiles, rooms[0].center, center_of_last_room, rooms)
 
 
-def generate_bsp_dungeon(
+def layout_bsp_dungeon(
     room_min_size: int,
     room_max_ratio: float,
     map_width: int,
     map_height: int,
-    engine: Engine,
-) -> GameMap:
-    """Generate a new dungeon map."""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    rng: random.Random,
+) -> DungeonLayout:
+    """Lay out rooms in the leaves of a BSP tree, connected through the tree."""
+    tiles = np.full((map_width, map_height), fill_value=tile_types.wall, order="F")
 
     bsp = tcod.bsp.BSP(0,0, width=map_width-1, height=map_height-1)
-    bsp.split_recursive(depth=6, min_width=room_min_size, min_height=room_min_size, max_horizontal_ratio=room_max_ratio, max_vertical_ratio=room_max_ratio)
+    bsp.split_recursive(depth=6, min_width=room_min_size, min_height=room_min_size, max_horizontal_ratio=room_max_ratio, max_vertical_ratio=room_max_ratio, seed=tcod.random.Random(seed=rng.getrandbits(32)))
 
     rooms: List[RectangularRoom] = []
 
     for node in bsp.pre_order():
         if node.children:
             node1, node2 = node.children
-            for x, y in tunnel_between((node1.x+(node1.width >> 1) + random.randint(-2,2), node1.y+(node1.height >> 1)), (node2.x+(node2.width >> 1), node2.y+(node2.height >> 1)+ random.randint(-2,2))):
-                dungeon.tiles[x, y] = tile_types.floor
+            for x, y in tunnel_between((node1.x+(node1.width >> 1) + rng.randint(-2,2), node1.y+(node1.height >> 1)), (node2.x+(node2.width >> 1), node2.y+(node2.height >> 1)+ rng.randint(-2,2)), rng):
+                tiles[x, y] = tile_types.floor
         else:
             rooms.append(RectangularRoom(node.x, node.y, node.width, node.height))
 
-    for i, room in enumerate(rooms):
-        dungeon.tiles[room.inner] = tile_types.floor
+    for room in rooms:
+        tiles[room.inner] = tile_types.floor
 
-        if i == 0:
-            player.place(*room.center, dungeon)
-        elif i + 1 == len(rooms):
-            dungeon.tiles[room.center] = tile_types.down_stairs
-            dungeon.downstairs_location = room.center
-            
-        place_entities(room, dungeon, engine.game_world.current_floor)
+    # The player starts in the first room, and the stairs are in the last.
+    tiles[rooms[-1].center] = tile_types.down_stairs
+    return DungeonLayout(tiles, rooms[0].center, rooms[-1].center, rooms)
 
-    return dungeon
+def count_wall_neighbors(wall: np.ndarray) -> np.ndarray:
+    """Return the number of walls in the 8 cells around each interior cell of `wall`."""
+    width, height = wall.shape
+    counts = np.zeros((width - 2, height - 2), dtype=np.int8)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if dx or dy:
+                counts += wall[1 + dx : width - 1 + dx, 1 + dy : height - 1 + dy]
+    return counts
 
-def generate_cave_dungeon(
+
+def layout_cave_dungeon(
     map_width: int,
     map_height: int,
-    engine: Engine,
-) -> GameMap:
-    """Generate a new dungeon map."""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    np_rng: np.random.Generator,
+) -> DungeonLayout:
+    """Lay out a cave with a cellular automaton."""
+    # Work on a boolean wall mask and only convert it to tiles once at the end.
+    wall = np.ones((map_width, map_height), dtype=bool, order="F")
+    wall[1:-1, 1:-1] = np_rng.random((map_width - 2, map_height - 2)) >= 0.45
 
-    random_array = np.random.rand(map_width,map_height)
+    for _ in range(0, 6):
+        new_wall = np.ones_like(wall)
+        new_wall[1:-1, 1:-1] = count_wall_neighbors(wall) > 4
+        wall = new_wall
 
-    for i in range(1, map_width-1):
-        for j in range(1, map_height-1):
-            if random_array[i,j] < 0.45: 
-                dungeon.tiles[i,j] = tile_types.floor
+    tiles = np.where(wall, tile_types.wall, tile_types.floor)
 
-    for _ in range(0, 6):
-        new_tiles = np.full((map_width, map_height), fill_value=tile_types.wall, order="F")
-        for i in range(1, map_width-1):
-            for j in range(1, map_height-1):
-                sum = 0
-                if dungeon.tiles[i+1,j] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i+1,j+1] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i+1,j-1] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i,j+1] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i,j-1] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i-1,j] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i-1,j+1] == tile_types.wall:
-                    sum += 1
-                if dungeon.tiles[i-1,j-1] == tile_types.wall:
-                    sum += 1
-                if sum == 8 or sum > 4:
-                    new_tiles[i,j] = tile_types.wall
-                else:
-                    new_tiles[i,j] = tile_types.floor
-        dungeon.tiles = copy.deepcopy(new_tiles)
-
-    for i in range(0, map_width):
-        dungeon.tiles[i,0] = tile_types.wall
-        dungeon.tiles[i,map_height-1] = tile_types.wall
-    for j in range(0, map_height):
-        dungeon.tiles[0,j] = tile_types.wall
-        dungeon.tiles[map_width-1,j] = tile_types.wall
-    
     x = map_width >> 1
     y = map_height >> 1
-    while dungeon.tiles[x, y] == tile_types.wall:
+    while tiles[x, y] == tile_types.wall:
         x -= 1
         if x == 1:
             y -= 1
             x = map_width >> 1
             if y == 1:
                 y = map_height - 1
-    player.place(x,y, dungeon)
-    
+
     exit_x = map_width - 5
     exit_y = map_height - 5
-    while dungeon.tiles[exit_x, exit_y] == tile_types.wall:
+    while tiles[exit_x, exit_y] == tile_types.wall:
         exit_x -= 1
         exit_y -= 1
     
     for i in range(10):
-        dungeon.tiles[exit_x - i, exit_y-i] = tile_types.floor
-        dungeon.tiles[exit_x - i + 1, exit_y-i] = tile_types.floor
-        dungeon.tiles[exit_x - i, exit_y-i + 1] = tile_types.floor
+        tiles[exit_x - i, exit_y-i] = tile_types.floor
+        tiles[exit_x - i + 1, exit_y-i] = tile_types.floor
+        tiles[exit_x - i, exit_y-i + 1] = tile_types.floor
+
+    tiles[exit_x, exit_y] = tile_types.down_stairs
+
+    return DungeonLayout(tiles, (x, y), (exit_x, exit_y), [])
+
+
+def populate_dungeon(layout: DungeonLayout, engine: Engine) -> GameMap:
+    """Return a new map of this layout, with the player and the entities of the current floor placed on it."""
+    player = engine.player
+    width, height = layout.tiles.shape
+    dungeon = GameMap(engine, width, height, entities=[player])
+    dungeon.tiles[...] = layout.tiles
+    dungeon.downstairs_location = layout.downstairs_location
+    player.place(*layout.player_start, dungeon)
+
+    floor_number = engine.game_world.current_floor
+    if floor_number > 1:
+        # The player arrives on the stairs back up.
+        dungeon.tiles[layout.player_start] = tile_types.up_stairs
+        dungeon.upstairs_location = layout.player_start
+    if layout.rooms:
+        for room in layout.rooms:
+            place_entities(room, dungeon, floor_number)
+    else:
+        scatter_entities(dungeon, floor_number)
+    return dungeon
+
 
-    dungeon.tiles[exit_x, exit_y] = tile_types.down_stairs
-    dungeon.downstairs_location = exit_x, exit_y
+def scatter_entities(dungeon: GameMap, floor_number: int) -> None:
+    """Place entities on about 4% of the floor tiles, except under the player."""
+    np_rng = dungeon.engine.game_world.np_rng
 
-    floor_num = engine.game_world.current_floor
+    monster_num = get_max_value_for_floor(max_monsters_by_floor, floor_number)
+    entity_num = get_max_value_for_floor(max_items_by_floor, floor_number) + monster_num
 
-    monsters: List[Entity] = get_entities_at_random(enemy_chances, 100, floor_num)
-    items: List[Entity] = get_entities_at_random(item_chances, 100, floor_num)
+    player = dungeon.engine.player
+    spawn_mask = dungeon.tiles == tile_types.floor
+    spawn_mask[player.x, player.y] = False
+    spawn_x, spawn_y = np.nonzero(spawn_mask)
+    chosen = np_rng.random(len(spawn_x)) < 40 / 1001
+    spawn_x, spawn_y = spawn_x[chosen], spawn_y[chosen]
 
-    monster_num = get_max_value_for_floor(max_monsters_by_floor, floor_num)
-    entity_num = get_max_value_for_floor(max_items_by_floor, floor_num) + monster_num
+    # Each spawn is a monster with a chance of monster_num in entity_num + 1, then each kind is sampled at once.
+    is_monster = np_rng.integers(0, entity_num, size=len(spawn_x), endpoint=True) < monster_num
+    monsters = iter(enemy_spawn_tables.for_floor(floor_number).sample(int(is_monster.sum()), np_rng))
+    items = iter(item_spawn_tables.for_floor(floor_number).sample(int((~is_monster).sum()), np_rng))
+    for i, j, monster in zip(spawn_x.tolist(), spawn_y.tolist(), is_monster.tolist()):
+        entity = next(monsters) if monster else next(items)
+        entity.spawn(dungeon, i, j)
 
-    for i in range(1, map_width-1):
-        for j in range(1, map_height-1):
-            if dungeon.tiles[i,j] == tile_types.floor and not (i == x and j == y):
-                if random.randint(0, 1000) < 40:
-                    if random.randint(0, entity_num) < monster_num:
-                        entity = monsters[random.randint(0, 99)]
-                    else:
-                        entity = items[random.randint(0, 99)]
-                    entity.spawn(dungeon, i, j)
 
-    return dungeon
\ No newline at end of file
+def generate_box_dungeon(max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+) -> GameMap:
+    """Generate a new dungeon map."""
+    layout = layout_box_dungeon(
+        max_rooms, room_min_size, room_max_size, map_width, map_height, engine.game_world.rng
+    )
+    return populate_dungeon(layout, engine)
+
+
+def generate_bsp_dungeon(
+    room_min_size: int,
+    room_max_ratio: float,
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+) -> GameMap:
+    """Generate a new dungeon map."""
+    layout = layout_bsp_dungeon(room_min_size, room_max_ratio, map_width, map_height, engine.game_world.rng)
+    return populate_dungeon(layout, engine)
+
+
+def generate_cave_dungeon(
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+) -> GameMap:
+    """Generate a new dungeon map."""
+    return populate_dungeon(layout_cave_dungeon(map_width, map_height, engine.game_world.np_rng), engine)
@@ -0,0 +1,128 @@
+"""Optional timing of each phase of a turn: the player's action, each AI, FOV and rendering.
+
+Enabled by setting the `BABEL_PROFILE` environment variable, which is also the file the results are written to
+(`1` writes to `profile.json`).  Results are written on exit, or when F12 is pressed in game.
+
+When disabled `phase` returns a shared do-nothing context manager, so instrumented code costs one function call.
+"""
+
+from __future__ import annotations
+
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+import atexit
+import contextlib
+import json
+import math
+import os
+import sys
+import time
+
+ENVIRONMENT_VARIABLE = "BABEL_PROFILE"
+DEFAULT_FILENAME = "profile.json"
+
+BUCKETS = 24
+"""Histogram buckets are powers of two in microseconds, the last one holds everything over ~8 seconds."""
+
+
+class Histogram:
+    """Counts samples in power of two buckets, so that memory use doesn't grow over a long game."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0  # Seconds.
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        microseconds = seconds * 1_000_000
+        bucket = math.frexp(microseconds)[1] if microseconds >= 1 else 0
+        self.buckets[min(bucket, BUCKETS - 1)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Return the upper bound in microseconds of the bucket holding this fraction of the samples."""
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return float(2**bucket)
+        return 0.0
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_us": self.total / self.count * 1_000_000 if self.count else 0.0,
+            "p50_us": self.percentile(0.5),
+            "p95_us": self.percentile(0.95),
+            "max_us": self.max * 1_000_000,
+            # Bucket upper bound in microseconds: number of samples.
+            "histogram": {2**bucket: count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class Profiler:
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.histograms: Dict[str, Histogram] = {}
+
+    @contextlib.contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(elapsed)
+
+    def report(self) -> List[str]:
+        """Return a text table of every phase, slowest in total first."""
+        lines = [f"{'phase':<32}{'count':>8}{'total (ms)':>12}{'mean (us)':>11}{'p95 (us)':>10}{'max (us)':>10}"]
+        for name, histogram in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+            summary = histogram.to_json()
+            lines.append(
+                f"{name:<32}{summary['count']:>8}{summary['total_ms']:>12.1f}{summary['mean_us']:>11.0f}"
+                f"{summary['p95_us']:>10.0f}{summary['max_us']:>10.0f}"
+            )
+        return lines
+
+    def dump(self) -> None:
+        """Write every histogram to `filename` and print a summary to stderr."""
+        with open(self.filename, "w") as f:
+            json.dump({name: histogram.to_json() for name, histogram in self.histograms.items()}, f, indent=2)
+        print("\n".join(self.report()), file=sys.stderr)
+        print(f"Profile written to {self.filename}", file=sys.stderr)
+
+
+def _profiler_from_environment() -> Optional[Profiler]:
+    setting = os.environ.get(ENVIRONMENT_VARIABLE, "")
+    if setting in ("", "0"):
+        return None
+    profiler = Profiler(DEFAULT_FILENAME if setting == "1" else setting)
+    atexit.register(profiler.dump)
+    return profiler
+
+
+active: Optional[Profiler] = _profiler_from_environment()
+"""The running profiler, or None if profiling is off."""
+
+_disabled: ContextManager[None] = contextlib.nullcontext()
+
+
+def phase(name: str, instance: Optional[object] = None) -> ContextManager[None]:
+    """Time the body of a with statement as the phase `name`.
+
+    If `instance` is given its class name is appended, so that each AI or action class is timed separately.
+    The name is only built while profiling.
+    """
+    if active is None:
+        return _disabled
+    if instance is not None:
+        name = f"{name}.{type(instance).__name__}"
+    return active.measure(name)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator, List, Optional, Set, Tuple
+import heapq
+
+if TYPE_CHECKING:
+    from entity import Actor
+    from game_map import GameMap
+
+NORMAL_SPEED = 100
+ACTION_TIME = 100
+"""How long one action takes at NORMAL_SPEED."""
+
+
+def action_time(actor: Actor) -> int:
+    """Return how long one action of this actor takes, faster actors take less time."""
+    return ACTION_TIME * NORMAL_SPEED // max(1, actor.body.speed)
+
+
+class TurnScheduler:
+    """A priority queue of the actors of one map, ordered by the time of their next action.
+
+    Actors due at the same time act in the order they were added to the map.
+    """
+
+    def __init__(self) -> None:
+        self.game_map: Optional[GameMap] = None
+        self.queue: List[Tuple[int, int, Actor]] = []
+        self.scheduled: Set[Actor] = set()
+
+    def reset(self, game_map: GameMap) -> None:
+        """Forget every scheduled actor and start scheduling the actors of `game_map`."""
+        self.game_map = game_map
+        self.queue = []
+        self.scheduled = set()
+
+    def add(self, actor: Actor, time: int) -> None:
+        """Schedule the next action of `actor` at `time`."""
+        assert self.game_map is not None
+        actor.next_time = time
+        heapq.heappush(self.queue, (time, self.game_map.entities[actor], actor))
+        self.scheduled.add(actor)
+
+    def pop_due(self, before: int) -> Iterator[Tuple[int, Actor]]:
+        """Remove and yield the time and actor of every action due before `before`, in order.
+
+        Actors added while iterating are yielded too if they are due in time.
+        """
+        while self.queue and self.queue[0][0] < before:
+            time, _, actor = heapq.heappop(self.queue)
+            self.scheduled.discard(actor)
+            yield time, actor
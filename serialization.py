@@ -0,0 +1,381 @@
+"""Read and write save files.
+
+A save file starts with `MAGIC` and a version number, followed by an LZMA compressed pickle of plain data.
+Map arrays are stored as raw NumPy buffers, and entities are stored as the name of their `entity_factories`
+prototype plus only the attributes which differ from that prototype.
+
+Floors the player has left are stored the same way, as separately compressed snapshots (see `save_floor`).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+import enum
+import lzma
+import pickle
+import struct
+
+import numpy as np
+
+from engine import Engine
+from entity import Actor, Entity, Item
+from floor_cache import FloorCache
+from game_map import GameMap, GameWorld
+from message_log import Message
+import components.ai
+import entity_factories
+import tile_types
+
+if TYPE_CHECKING:
+    from components.ai import BaseAI
+    from components.body import Body
+
+MAGIC = b"BOOALSAV"
+SAVE_VERSION = 2  # 2 added the floors the player has left.
+HEADER = struct.Struct(f"<{len(MAGIC)}sH")
+
+ITEM_COMPONENTS = ("consumable", "equippable", "part", "stack")
+ACTOR_COMPONENTS = ("fighter", "level", "loot_table")
+MAP_LAYERS = ("visible", "loaded", "explored")
+
+
+class SaveFormatError(Exception):
+    """Raised when a file is not a save file or was written by a newer version of the game."""
+
+
+def is_plain(value: Any) -> bool:
+    """Return True if value can be stored directly in a save."""
+    if value is None or isinstance(value, (bool, int, float, str, enum.Enum)):
+        return True
+    if isinstance(value, (tuple, list)):
+        return all(is_plain(item) for item in value)
+    return False
+
+
+def encode_attributes(obj: object, prototype: Optional[object]) -> Dict[str, Any]:
+    """Return the plain attributes of `obj` which differ from those of `prototype`."""
+    prototype_attributes = vars(prototype) if prototype is not None else {}
+    return {
+        name: value
+        for name, value in vars(obj).items()
+        if is_plain(value) and (name not in prototype_attributes or prototype_attributes[name] != value)
+    }
+
+
+def decode_attributes(obj: object, attributes: Dict[str, Any]) -> None:
+    vars(obj).update(attributes)
+
+
+def get_prototype(entity: Entity) -> Entity:
+    if entity.prototype_id is None:
+        raise SaveFormatError(f"{entity.name!r} was not created from an entity_factories prototype.")
+    return entity_factories.prototypes[entity.prototype_id]
+
+
+class Encoder:
+    """Converts an Engine, or one of its floors, into plain data."""
+
+    def __init__(self, engine: Engine, game_map: Optional[GameMap] = None):
+        self.engine = engine
+        self.game_map = game_map if game_map is not None else engine.game_map
+        # Entities on the map are referred to by their index in this list, the player is always first.
+        self.map_entities: List[Entity] = [engine.player] + [
+            entity for entity in self.game_map.entities if entity is not engine.player
+        ]
+        self.entity_indexes = {entity: i for i, entity in enumerate(self.map_entities)}
+        self.prototype_contents: Dict[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+
+    def encode(self) -> Dict[str, Any]:
+        engine = self.engine
+        return {
+            "mouse_location": engine.mouse_location,
+            "turn": engine.turn,
+            "time": engine.time,
+            "messages": [(message.plain_text, message.fg, message.count) for message in engine.message_log.messages],
+            "game_world": {name: value for name, value in engine.game_world.__getstate__().items() if name != "engine"},
+            "floors": engine.game_world.floor_cache.snapshots(engine),
+            **self.encode_floor(),
+        }
+
+    def encode_floor(self, include_player: bool = True) -> Dict[str, Any]:
+        """Return the map and its entities.  Floors the player has left are stored without the player."""
+        game_map = self.game_map
+        return {
+            "map": {
+                "width": game_map.width,
+                "height": game_map.height,
+                "downstairs_location": game_map.downstairs_location,
+                "upstairs_location": game_map.upstairs_location,
+                "tiles": game_map.tiles.tobytes(order="F"),
+                **{layer: np.packbits(getattr(game_map, layer), axis=None).tobytes() for layer in MAP_LAYERS},
+            },
+            "entities": [self.encode_entity(entity) for entity in self.map_entities[0 if include_player else 1 :]],
+        }
+
+    def encode_entity(self, entity: Entity) -> Dict[str, Any]:
+        if isinstance(entity, Actor):
+            return self.encode_actor(entity)
+        if isinstance(entity, Item):
+            return self.encode_item(entity)
+        prototype = get_prototype(entity)
+        return {"prototype": entity.prototype_id, "attributes": encode_attributes(entity, prototype)}
+
+    def encode_item(self, item: Item) -> Dict[str, Any]:
+        prototype = get_prototype(item)
+        record: Dict[str, Any] = {"prototype": item.prototype_id, "attributes": encode_attributes(item, prototype)}
+        for name in ITEM_COMPONENTS:
+            component = getattr(item, name)
+            if component:
+                record[name] = encode_attributes(component, getattr(prototype, name))
+        return record
+
+    def encode_actor(self, actor: Actor) -> Dict[str, Any]:
+        prototype = get_prototype(actor)
+        assert isinstance(prototype, Actor)
+        record: Dict[str, Any] = {
+            "prototype": actor.prototype_id,
+            "attributes": encode_attributes(actor, prototype),
+            "ai": self.encode_ai(actor.ai),
+            "inventory": encode_attributes(actor.inventory, prototype.inventory),
+            "body": encode_attributes(actor.body, prototype.body),
+        }
+        for name in ACTOR_COMPONENTS:
+            record[name] = encode_attributes(getattr(actor, name), getattr(prototype, name))
+
+        # Inventory items and body parts are only stored if they differ from those of the prototype.
+        prototype_items, prototype_parts = self.encode_contents(prototype)
+        items, parts = self.encode_contents(actor)
+        if items != prototype_items:
+            record["items"] = items
+        if parts != prototype_parts:
+            record["parts"] = parts
+
+        equipment: Dict[str, Any] = {}
+        for slot in ("weapon", "armor"):
+            item = getattr(actor.equipment, slot)
+            if item is None:
+                continue
+            if item in actor.inventory.items:
+                equipment[slot] = actor.inventory.items.index(item)
+            else:
+                equipment[slot] = self.encode_item(item)
+        record["equipment"] = equipment
+        return record
+
+    def encode_contents(self, actor: Actor) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Return the records of the inventory items and body parts of `actor`, cached for prototypes."""
+        prototype_id = actor.prototype_id if actor is get_prototype(actor) else None
+        if prototype_id is not None and prototype_id in self.prototype_contents:
+            return self.prototype_contents[prototype_id]
+        contents = (
+            [self.encode_item(item) for item in actor.inventory.items],
+            self.encode_parts(actor.body),
+        )
+        if prototype_id is not None:
+            self.prototype_contents[prototype_id] = contents
+        return contents
+
+    def encode_parts(self, body: Body) -> List[Dict[str, Any]]:
+        """Return an item record per body part, without giving parts which have no Item of their own one."""
+        records = []
+        for index, item in enumerate(body.items):
+            if item is not None:
+                records.append(self.encode_item(body.part_at(index).parent))
+                continue
+            prototype = entity_factories.part_prototypes[int(body.spec_ids[index])]
+            assert prototype.part
+            record = self.encode_item(prototype)
+            current_health = int(body.current_health[index])
+            if current_health != prototype.part.current_health:
+                record["part"] = {"current_health": current_health}
+            records.append(record)
+        return records
+
+    def encode_ai(self, ai: Optional[BaseAI]) -> Optional[Dict[str, Any]]:
+        if ai is None:
+            return None
+        state: Dict[str, Any] = {}
+        for name, value in vars(ai).items():
+            if name == "entity":
+                continue
+            if isinstance(value, components.ai.BaseAI):
+                state[name] = {"ai": self.encode_ai(value)}
+            elif isinstance(value, Entity):
+                # Entities which aren't on the map, such as a dead bully, are stored as None.
+                state[name] = {"entity": self.entity_indexes.get(value)}
+            else:
+                state[name] = value
+        return {"class": type(ai).__name__, "state": state}
+
+
+class Decoder:
+    """Rebuilds an Engine from the plain data made by Encoder."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.map_entities: List[Entity] = []
+        # AI attributes referring to other entities, resolved once every entity exists.
+        self.entity_references: List[Tuple[BaseAI, str, int]] = []
+
+    def decode(self) -> Engine:
+        data = self.data
+        self.map_entities = [self.decode_entity(record) for record in data["entities"]]
+        player = self.map_entities[0]
+        assert isinstance(player, Actor)
+
+        engine = Engine(player=player)
+        engine.mouse_location = data["mouse_location"]
+        engine.turn = data.get("turn", 0)
+        engine.time = data.get("time", 0)
+        for text, fg, count in data["messages"]:
+            message = Message(text, fg)
+            message.count = count
+            engine.message_log.messages.append(message)
+
+        engine.game_world = GameWorld.__new__(GameWorld)
+        engine.game_world.__setstate__({**data["game_world"], "engine": engine, "floor_cache": FloorCache()})
+        engine.game_world.floor_cache.restore(data.get("floors", {}))
+
+        engine.game_map = self.decode_map(engine)
+        return engine
+
+    def decode_floor(self, engine: Engine) -> GameMap:
+        """Rebuild a floor stored without the player, for the player of `engine`."""
+        self.map_entities = [engine.player] + [self.decode_entity(record) for record in self.data["entities"]]
+        return self.decode_map(engine, include_player=False)
+
+    def decode_map(self, engine: Engine, include_player: bool = True) -> GameMap:
+        map_data = self.data["map"]
+        width, height = map_data["width"], map_data["height"]
+        game_map = GameMap(engine, width, height)
+        game_map.tiles[...] = np.frombuffer(map_data["tiles"], dtype=tile_types.tile_dt).reshape(
+            (width, height), order="F"
+        )
+        for layer in MAP_LAYERS:
+            bits = np.unpackbits(np.frombuffer(map_data[layer], dtype=np.uint8), count=width * height)
+            getattr(game_map, layer)[...] = bits.astype(bool).reshape((width, height))
+        game_map.downstairs_location = map_data["downstairs_location"]
+        game_map.upstairs_location = map_data.get("upstairs_location")
+
+        for entity in self.map_entities[0 if include_player else 1 :]:
+            entity.parent = game_map
+            game_map.add_entity(entity)
+        for ai, name, index in self.entity_references:
+            setattr(ai, name, self.map_entities[index])
+        return game_map
+
+    def decode_entity(self, record: Dict[str, Any]) -> Entity:
+        prototype = entity_factories.prototypes[record["prototype"]]
+        if isinstance(prototype, Actor):
+            return self.decode_actor(record, prototype)
+        if isinstance(prototype, Item):
+            return self.decode_item(record, prototype)
+        entity = prototype.clone()
+        decode_attributes(entity, record["attributes"])
+        return entity
+
+    def decode_item(self, record: Dict[str, Any], prototype: Optional[Entity] = None) -> Item:
+        if prototype is None:
+            prototype = entity_factories.prototypes[record["prototype"]]
+        item = prototype.clone()
+        assert isinstance(item, Item)
+        decode_attributes(item, record["attributes"])
+        for name in ITEM_COMPONENTS:
+            if name in record:
+                decode_attributes(getattr(item, name), record[name])
+        return item
+
+    def decode_actor(self, record: Dict[str, Any], prototype: Entity) -> Actor:
+        actor = prototype.clone()
+        assert isinstance(actor, Actor)
+        decode_attributes(actor, record["attributes"])
+        for name in ACTOR_COMPONENTS:
+            decode_attributes(getattr(actor, name), record[name])
+
+        decode_attributes(actor.inventory, record["inventory"])
+        if "items" in record:
+            actor.inventory.items = [self.decode_item(item_record) for item_record in record["items"]]
+            for item in actor.inventory.items:
+                item.parent = actor.inventory
+
+        decode_attributes(actor.body, record["body"])
+        if "parts" in record:
+            self.decode_parts(actor.body, record["parts"])
+        actor.body.invalidate_stats()
+
+        for slot, value in record["equipment"].items():
+            item = actor.inventory.items[value] if isinstance(value, int) else self.decode_item(value)
+            setattr(actor.equipment, slot, item)
+        actor.equipment.invalidate_stats()
+
+        actor.ai = self.decode_ai(record["ai"], actor)
+        return actor
+
+    def decode_parts(self, body: Body, records: List[Dict[str, Any]]) -> None:
+        """Replace the parts of a body.  Parts stored as an unchanged copy of their prototype get no Item."""
+        spec_ids, current_health, items = [], [], []
+        for record in records:
+            item: Optional[Item] = None
+            if record["attributes"] or set(record) - {"prototype", "attributes", "part"}:
+                item = self.decode_item(record)
+                part = item.part
+            else:
+                part = entity_factories.prototypes[record["prototype"]].part  # type: ignore[attr-defined]
+            assert part is not None
+            spec_ids.append(part.spec_id)
+            current_health.append(record.get("part", {}).get("current_health", part.current_health))
+            items.append(item)
+        body.spec_ids = np.array(spec_ids, dtype=np.int16)
+        body.current_health = np.array(current_health, dtype=np.int16)
+        body.items = items
+
+    def decode_ai(self, record: Optional[Dict[str, Any]], actor: Actor) -> Optional[BaseAI]:
+        if record is None:
+            return None
+        ai_class = getattr(components.ai, record["class"])
+        ai = ai_class.__new__(ai_class)
+        ai.entity = actor
+        for name, value in record["state"].items():
+            if isinstance(value, dict) and "ai" in value:
+                value = self.decode_ai(value["ai"], actor)
+            elif isinstance(value, dict) and "entity" in value:
+                if value["entity"] is not None:
+                    self.entity_references.append((ai, name, value["entity"]))
+                value = None
+            setattr(ai, name, value)
+        return ai
+
+
+def save_floor(engine: Engine, game_map: GameMap) -> bytes:
+    """Return a compressed snapshot of a floor of `engine` other than the current one."""
+    data = Encoder(engine, game_map).encode_floor(include_player=False)
+    return lzma.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), preset=1)
+
+
+def load_floor(engine: Engine, snapshot: bytes) -> GameMap:
+    """Rebuild a floor from a snapshot made by `save_floor`."""
+    return Decoder(pickle.loads(lzma.decompress(snapshot))).decode_floor(engine)
+
+
+def save_engine(engine: Engine, filename: str) -> None:
+    """Save an Engine to a file."""
+    payload = lzma.compress(pickle.dumps(Encoder(engine).encode(), protocol=pickle.HIGHEST_PROTOCOL), preset=1)
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SAVE_VERSION))
+        f.write(payload)
+
+
+def load_engine(filename: str) -> Engine:
+    """Load an Engine from a file.
+
+    Saves from before this format existed, which pickled the whole Engine, can't be loaded.
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise SaveFormatError(f"{filename} is a save from an older version.")
+
+    _, version = HEADER.unpack_from(data)
+    if version > SAVE_VERSION:
+        raise SaveFormatError(f"{filename} was saved by a newer version of the game (format {version}).")
+    return Decoder(pickle.loads(lzma.decompress(data[HEADER.size :]))).decode()
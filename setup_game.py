@@ -1,35 +1,55 @@
-"""Handle the loading and initialization of game sessions."""
+"""Handle the loading and initialization of game sessions.
+
+The game modules and entity prototypes are only imported once a game is started or loaded, so that the main
+menu can be shown as soon as possible.
+"""
 from __future__ import annotations
 
-from typing import Optional
-import copy
-import lzma
-import pickle
+from typing import TYPE_CHECKING, Any, Optional
 import traceback
 
-from PIL import Image  # type: ignore
 import tcod
 
-from engine import Engine
-from game_map import GameWorld
 import color
-import entity_factories
 import input_handlers
 
-# Load the background image.  Pillow returns an object convertable into a NumPy array.
-background_image = Image.open("data/menu_background.png")
+if TYPE_CHECKING:
+    from engine import Engine
+
+BACKGROUND_IMAGE_PATH = "data/menu_background.png"
+
+background_image: Any = None  # Loaded by get_background_image.
+
+
+def get_background_image() -> Any:
+    """Return the menu background image, loading it the first time.
+
+    Pillow returns an object convertable into a NumPy array.
+    """
+    global background_image
+    if background_image is None:
+        from PIL import Image  # type: ignore
 
+        background_image = Image.open(BACKGROUND_IMAGE_PATH)
+    return background_image
+
+
+def new_game(seed: Optional[int] = None, map_width: int = 80, map_height: int = 43) -> Engine:
+    """Return a brand new game session as an Engine instance.
+
+    Games started with the same `seed` play out identically given the same actions.
+    Maps larger than the screen scroll with the player.
+    """
+    from engine import Engine
+    from game_map import GameWorld
+    import entity_factories
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
-    map_width = 80
-    map_height = 43
 
     room_max_size = 10
     room_min_size = 6
     max_rooms = 30
 
-    player = copy.deepcopy(entity_factories.player)
+    player = entity_factories.player.clone()
 
     engine = Engine(player=player)
 
@@ -40,6 +60,7 @@ def new_game() -> Engine:
         room_max_size=room_max_size,
         map_width=map_width,
         map_height=map_height,
+        seed=seed,
     )
 
     engine.game_world.generate_floor()
@@ -47,10 +68,10 @@ def new_game() -> Engine:
 
     engine.message_log.add_message("You wake up in a library.", color.welcome_text)
 
-    dagger = copy.deepcopy(entity_factories.dagger)
-    leather_armor = copy.deepcopy(entity_factories.leather_armor)
-    sacrificial_dagger = copy.deepcopy(entity_factories.sacrificial_dagger)
-    glass_shard = copy.deepcopy(entity_factories.glass_shard)
+    dagger = entity_factories.dagger.clone()
+    leather_armor = entity_factories.leather_armor.clone()
+    sacrificial_dagger = entity_factories.sacrificial_dagger.clone()
+    glass_shard = entity_factories.glass_shard.clone()
     glass_shard.stack.stack = 7
 
     dagger.parent = player.inventory
@@ -70,10 +91,9 @@ def new_game() -> Engine:
 
 def load_game(filename: str) -> Engine:
     """Load an Engine instance from a file."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
-    assert isinstance(engine, Engine)
-    return engine
+    import serialization
+
+    return serialization.load_engine(filename)
 
 
 class MainMenu(input_handlers.BaseEventHandler):
@@ -81,7 +101,7 @@ class MainMenu(input_handlers.BaseEventHandler):
 
     def on_render(self, console: tcod.Console) -> None:
         """Render the main menu on a background image."""
-        console.draw_semigraphics(background_image, 0, 0)
+        console.draw_semigraphics(get_background_image(), 0, 0)
 
         console.print(
             console.width // 2,
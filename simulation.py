@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Run the game without a window or tileset, for balance sweeps and performance tests.
+
+Actions are chosen by a policy and fed through `EventHandler.handle_action`, exactly as key presses would be.
+
+    python simulation.py --turns 5000 --policy descend
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, NamedTuple, Optional
+import argparse
+import time
+
+from actions import Action, BumpAction, MeleeAction, PickupAction, TakeStairsAction
+from components.ai import BaseAI, HostileEnemy
+from engine import Engine
+import input_handlers
+import setup_game
+
+Policy = Callable[[Engine], Action]
+"""Picks the next action for the player."""
+
+DIRECTIONS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+
+
+def wander_policy(engine: Engine) -> Action:
+    """Bump in a random direction."""
+    return BumpAction(engine.player, *engine.game_world.rng.choice(DIRECTIONS))
+
+
+def descend_policy(engine: Engine) -> Action:
+    """Fight adjacent hostiles, pick up items, and otherwise head for the stairs."""
+    player = engine.player
+    game_map = engine.game_map
+
+    for dx, dy in DIRECTIONS:
+        target = game_map.get_actor_at_location(player.x + dx, player.y + dy)
+        if target and isinstance(target.ai, HostileEnemy):
+            return MeleeAction(player, dx, dy)
+
+    if (player.x, player.y) == game_map.downstairs_location:
+        return TakeStairsAction(player)
+    if game_map.get_items_at_location(player.x, player.y) and len(player.inventory.items) < player.inventory.capacity:
+        return PickupAction(player)
+
+    path = BaseAI(player).get_path_to(*game_map.downstairs_location)
+    if path:
+        dest_x, dest_y = path[0]
+        return BumpAction(player, dest_x - player.x, dest_y - player.y)
+    return wander_policy(engine)
+
+
+POLICIES: Dict[str, Policy] = {
+    "wander": wander_policy,
+    "descend": descend_policy,
+}
+
+
+class SimulationResult(NamedTuple):
+    turns: int  # Actions which advanced a turn.
+    attempts: int  # Every action tried, including impossible ones.
+    floor: int
+    player_alive: bool
+    elapsed: float  # Seconds.
+
+    @property
+    def turns_per_second(self) -> float:
+        return self.turns / self.elapsed if self.elapsed else float("inf")
+
+
+class Simulation:
+    """Drives an Engine with a policy instead of keyboard events."""
+
+    def __init__(self, engine: Engine, policy: Policy = descend_policy):
+        self.engine = engine
+        self.policy = policy
+        self.handler = input_handlers.EventHandler(engine)
+
+    def step(self) -> bool:
+        """Attempt one action.  Returns True if it advanced a turn."""
+        performed = self.handler.handle_action(self.policy(self.engine))
+        level = self.engine.player.level
+        if level.requires_level_up:
+            # Spread level ups evenly, as there is no one to answer the level up menu.
+            self.engine.game_world.rng.choice([level.increase_max_hp, level.increase_power, level.increase_defense])()
+        return performed
+
+    def run(self, turns: int, max_attempts: Optional[int] = None) -> SimulationResult:
+        """Run until `turns` turns have passed, the player dies, or `max_attempts` actions were tried."""
+        if max_attempts is None:
+            max_attempts = turns * 10  # Stop policies which keep choosing impossible actions.
+        performed_turns = attempts = 0
+        start = time.perf_counter()
+        while performed_turns < turns and attempts < max_attempts and self.engine.player.is_alive:
+            attempts += 1
+            if self.step():
+                performed_turns += 1
+        return SimulationResult(
+            turns=performed_turns,
+            attempts=attempts,
+            floor=self.engine.game_world.current_floor,
+            player_alive=self.engine.player.is_alive,
+            elapsed=time.perf_counter() - start,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000, help="turns to simulate per game")
+    parser.add_argument("--games", type=int, default=1, help="number of new games to simulate")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="descend")
+    parser.add_argument("--seed", type=int, default=None, help="world seed of the first game, later games add 1 each")
+    parser.add_argument("--map-size", default="80x43", metavar="WxH", help="size of every floor")
+    args = parser.parse_args()
+    map_width, map_height = (int(size) for size in args.map_size.lower().split("x"))
+
+    for game in range(args.games):
+        seed = None if args.seed is None else args.seed + game
+        engine = setup_game.new_game(seed, map_width=map_width, map_height=map_height)
+        result = Simulation(engine, POLICIES[args.policy]).run(args.turns)
+        print(
+            f"game {game}: {result.turns} turns, floor {result.floor}, "
+            f"{'alive' if result.player_alive else 'dead'}, "
+            f"{result.elapsed:.2f}s ({result.turns_per_second:.0f} turns/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -54,3 +54,9 @@ def new_tile(
     dark=(ord(">"), (100, 100, 100), (0, 0, 0)),
     light=(ord(">"), (200, 200, 200), (0, 0, 0)),
 )
+up_stairs = new_tile(
+    walkable=True,
+    transparent=True,
+    dark=(ord("<"), (100, 100, 100), (0, 0, 0)),
+    light=(ord("<"), (200, 200, 200), (0, 0, 0)),
+)
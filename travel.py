@@ -0,0 +1,91 @@
+"""Path planning for auto-explore and travel, which walk the player many steps for one command."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, List, Tuple
+
+import numpy as np
+import tcod
+
+from components.ai import ConfusedEnemy, FleeingNeutral, HostileEnemy
+
+if TYPE_CHECKING:
+    from entity import Actor
+    from game_map import GameMap
+
+SEARCH_RADII = (16, 64, None)
+"""Windows around the player searched for a goal in turn, None is the whole map.
+
+Most goals are close, so a small Dijkstra map usually finds one and the cost of a step doesn't depend on the
+size of the map.
+"""
+
+
+def is_hostile(actor: Actor) -> bool:
+    """Return True if an actor will attack the player, once it is no longer confused or fleeing."""
+    ai = actor.ai
+    while isinstance(ai, (ConfusedEnemy, FleeingNeutral)):
+        ai = ai.previous_ai
+    return isinstance(ai, HostileEnemy)
+
+
+def visible_hostiles(game_map: GameMap, player: Actor) -> List[Actor]:
+    """Return the hostile actors the player can see, in map order."""
+    store = game_map.actor_store
+    seen = store.alive & game_map.visible[store.x, store.y]
+    actors = [actor for actor in store.handles[seen].tolist() if actor is not player and is_hostile(actor)]
+    return sorted(actors, key=game_map.entities.__getitem__)
+
+
+def path_to_frontier(game_map: GameMap, start: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Return the steps from `start` to the nearest walkable tile which hasn't been explored yet."""
+    return path_to_nearest(game_map, start, lambda area: game_map.tiles["walkable"][area] & ~game_map.explored[area])
+
+
+def path_to(game_map: GameMap, start: Tuple[int, int], destination: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Return the steps from `start` to `destination`."""
+
+    def goals(area: Tuple[slice, slice]) -> np.ndarray:
+        result = np.zeros((area[0].stop - area[0].start, area[1].stop - area[1].start), dtype=bool, order="F")
+        x, y = destination[0] - area[0].start, destination[1] - area[1].start
+        if 0 <= x < result.shape[0] and 0 <= y < result.shape[1]:
+            result[x, y] = True
+        return result
+
+    return path_to_nearest(game_map, start, goals)
+
+
+def path_to_nearest(
+    game_map: GameMap, start: Tuple[int, int], goals: Callable[[Tuple[slice, slice]], np.ndarray]
+) -> List[Tuple[int, int]]:
+    """Return the steps from `start` to the nearest goal, or an empty list if none can be reached.
+
+    `goals` returns the mask of the goals inside of an area of the map.  Paths only cross explored tiles, and go
+    around entities only where the player can see them, so that they don't give away monsters out of sight.
+    """
+    x, y = start
+    for radius in SEARCH_RADII:
+        if radius is None:
+            area = (slice(0, game_map.width), slice(0, game_map.height))
+        else:
+            area = (
+                slice(max(0, x - radius), min(x + radius + 1, game_map.width)),
+                slice(max(0, y - radius), min(y + radius + 1, game_map.height)),
+            )
+        blocked = game_map.blocked[area] & game_map.visible[area]
+        goal = goals(area) & ~blocked
+        if goal.any():
+            walkable = game_map.tiles["walkable"][area] & (game_map.explored[area] | goal) & ~blocked
+            cost = walkable.astype(np.int8)
+            origin = x - area[0].start, y - area[1].start
+            cost[origin] = 1  # Not blocked by the player standing on it.
+
+            distance = tcod.path.maxarray(cost.shape, dtype=np.int32, order="F")
+            distance[goal] = 0
+            tcod.path.dijkstra2d(distance, cost, cardinal=2, diagonal=3, out=distance)
+            if distance[origin] != np.iinfo(np.int32).max:
+                path = tcod.path.hillclimb2d(distance, origin, cardinal=True, diagonal=True)[1:]
+                return [(i + area[0].start, j + area[1].start) for i, j in path.tolist()]
+        if radius is not None and radius >= max(game_map.width, game_map.height):
+            break  # The window already covered the whole map.
+    return []